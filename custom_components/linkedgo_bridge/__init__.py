@@ -9,14 +9,16 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .coordinator import MyCoordinator
-from .xlink_ptp import PTP
+from .xlink_ptp import PTP, APIAuthError, APIDATAEMPTYError, APIREQUESTError
 from .hub import Hub
-from .const import DOMAIN
+from .const import DATA_METADATA_CACHE, DOMAIN
+from .xlink_cache import XlinkMetadataCache
 
 logger = logging.getLogger(__name__)
 
@@ -37,34 +39,49 @@ class RuntimeData:
 async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -> bool:
     """Set up Example Integration from a config entry."""
 
-    ptp = PTP()
-    if not ptp.authorization_validate(timedelta=0):
-        username = config_entry.data["username"]
-        password = config_entry.data["password"]
-        await ptp.async_user_auth(username, password)
+    username = config_entry.data["username"]
+    password = config_entry.data["password"]
+    ptp = PTP(
+        async_get_clientsession(hass),
+        metadata_cache=async_get_metadata_cache(hass, username),
+    )
+    ptp.set_credentials(username, password)
     hub = Hub(hass, ptp)
-
-    # ----------------------------------------------------------------------------
-    # Initialise the coordinator that manages data updates from your api.
-    # This is defined in coordinator.py
-    # ----------------------------------------------------------------------------
-    coordinator = MyCoordinator(hass, config_entry, hub)
-
-    # ----------------------------------------------------------------------------
-    # Perform an initial data load from api.
-    # async_config_entry_first_refresh() is special in that it does not log errors
-    # if it fails.
-    # ----------------------------------------------------------------------------
-    await coordinator.async_config_entry_first_refresh()
-
-    # ----------------------------------------------------------------------------
-    # Test to see if api initialised correctly, else raise ConfigNotReady to make
-    # HA retry setup.
-    # Change this to match how your api will know if connected or successful
-    # update.
-    # ----------------------------------------------------------------------------
-    if not coordinator.data:
-        raise ConfigEntryNotReady
+    # A failed attempt releases its client, HA retries setup with a new one.
+    set_up = False
+    try:
+        if not ptp.authorization_validate(timedelta=0):
+            await ptp.async_user_auth(username, password)
+
+        # ------------------------------------------------------------------------
+        # Initialise the coordinator that manages data updates from your api.
+        # This is defined in coordinator.py
+        # ------------------------------------------------------------------------
+        coordinator = MyCoordinator(hass, config_entry, hub)
+
+        # ------------------------------------------------------------------------
+        # Perform an initial data load from api.
+        # async_config_entry_first_refresh() is special in that it does not log
+        # errors if it fails.
+        # ------------------------------------------------------------------------
+        await coordinator.async_config_entry_first_refresh()
+
+        # ------------------------------------------------------------------------
+        # Test to see if api initialised correctly, else raise ConfigNotReady to
+        # make HA retry setup.
+        # Change this to match how your api will know if connected or successful
+        # update.
+        # ------------------------------------------------------------------------
+        if not coordinator.data:
+            raise ConfigEntryNotReady
+        set_up = True
+    except APIAuthError as err:
+        raise ConfigEntryAuthFailed from err
+    except (APIREQUESTError, APIDATAEMPTYError) as err:
+        raise ConfigEntryNotReady from err
+    finally:
+        if not set_up:
+            await hub.async_close()
 
     # ----------------------------------------------------------------------------
     # Initialise a listener for config flow options changes.
@@ -93,6 +110,14 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) ->
     return True
 
 
+def async_get_metadata_cache(hass: HomeAssistant, username: str) -> XlinkMetadataCache:
+    """Return the metadata cache of an account, shared by reloads and flows."""
+    caches = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_METADATA_CACHE, {})
+    if username not in caches:
+        caches[username] = XlinkMetadataCache()
+    return caches[username]
+
+
 async def _async_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
     """Handle config options update.
 
@@ -111,6 +136,12 @@ async def async_remove_config_entry_device(
     Remove this function if you do not want that option.
     You may need to do some checks here before allowing devices to be removed.
     """
+    # The device list changes, download it again on the next query.
+    hub = config_entry.runtime_data.coordinator.hub
+    hub.ptp.invalidate_metadata()
+    for domain, device_id in device_entry.identifiers:
+        if domain == DOMAIN:
+            hub.remove_device(device_id)
     return True
 
 
@@ -125,5 +156,10 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -
     for service in hass.services.async_services_for_domain(DOMAIN):
         hass.services.async_remove(DOMAIN, service)
 
-    # Unload platforms and return result
-    return await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    # Unload platforms, then release the pooled http connections
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        config_entry, PLATFORMS
+    )
+    if unload_ok:
+        await config_entry.runtime_data.coordinator.hub.async_close()
+    return unload_ok
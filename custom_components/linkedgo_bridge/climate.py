@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 import logging
-import asyncio
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.exceptions import HomeAssistantError
@@ -33,7 +33,6 @@ from homeassistant.components.climate import (
     ATTR_TARGET_TEMP_HIGH,
     ATTR_TARGET_TEMP_LOW,
     ATTR_TARGET_TEMP_STEP,
-    HVACAction,
     HVACMode,
     SERVICE_SET_FAN_MODE,
     SERVICE_SET_PRESET_MODE,
@@ -54,6 +53,44 @@ from .const import DeviceEntity
 
 logger = logging.getLogger(__name__)
 
+# (_attr_* field, DeviceEntity.properties key) of the decoded datapoints
+PROPERTY_ATTRS = (
+    ("_attr_current_humidity", ATTR_CURRENT_HUMIDITY),
+    ("_attr_current_temperature", ATTR_CURRENT_TEMPERATURE),
+    ("_attr_fan_mode", ATTR_FAN_MODE),
+    ("_attr_hvac_action", ATTR_HVAC_ACTION),
+    ("_attr_hvac_mode", ATTR_HVAC_MODE),
+    ("_attr_preset_mode", ATTR_PRESET_MODE),
+    ("_attr_target_humidity", SERVICE_SET_HUMIDITY),
+    ("_attr_target_temperature", SERVICE_SET_TEMPERATURE),
+)
+
+# (_attr_* field, DeviceEntity.capabilities key) of the model capabilities
+CAPABILITY_ATTRS = (
+    ("_attr_fan_modes", ATTR_FAN_MODES),
+    ("_attr_hvac_modes", ATTR_HVAC_MODES),
+    ("_attr_max_humidity", ATTR_MAX_HUMIDITY),
+    ("_attr_max_temp", ATTR_MAX_TEMP),
+    ("_attr_min_humidity", ATTR_MIN_HUMIDITY),
+    ("_attr_min_temp", ATTR_MIN_TEMP),
+    ("_attr_preset_modes", ATTR_PRESET_MODES),
+    ("_attr_target_temperature_high", ATTR_TARGET_TEMP_HIGH),
+    ("_attr_target_temperature_low", ATTR_TARGET_TEMP_LOW),
+    ("_attr_target_temperature_step", ATTR_TARGET_TEMP_STEP),
+)
+
+# _attr_* field of each DeviceEntity.properties key
+PROPERTY_FIELD_ATTRS = {field: attr for attr, field in PROPERTY_ATTRS}
+
+# DeviceEntity.properties key a control service sets to its value
+SERVICE_PROPERTIES = {
+    SERVICE_SET_FAN_MODE: ATTR_FAN_MODE,
+    SERVICE_SET_HUMIDITY: SERVICE_SET_HUMIDITY,
+    SERVICE_SET_HVAC_MODE: ATTR_HVAC_MODE,
+    SERVICE_SET_PRESET_MODE: ATTR_PRESET_MODE,
+    SERVICE_SET_TEMPERATURE: SERVICE_SET_TEMPERATURE,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -77,6 +114,9 @@ class MyThermostat(CoordinatorEntity, ClimateEntity):
 
     supported_features = None
 
+    _attr_precision = PRECISION_TENTHS
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+
     def __init__(
         self, coordinator: MyCoordinator, hub: Hub, entity: DeviceEntity
     ) -> None:
@@ -89,14 +129,74 @@ class MyThermostat(CoordinatorEntity, ClimateEntity):
         self._attr_unique_id = formatted_mac  # stable ID
         self._attr_name = self.entity.device_name  # shown in UI
 
-        self._attr_fan_mode = self.entity.properties.get(ATTR_FAN_MODE)
-        self._attr_hvac_action = self.entity.properties.get(ATTR_HVAC_ACTION)
-        self._attr_hvac_mode = self.entity.properties.get(ATTR_HVAC_MODE)
-        self._attr_preset_mode = self.entity.properties.get(ATTR_PRESET_MODE)
-        self._attr_target_temperature = self.entity.properties.get(
-            SERVICE_SET_TEMPERATURE
+        # what the last state write showed, see _async_write_ha_state_if_changed
+        self._written_state = None
+        # {properties key: value} shown before the device reports it
+        self._optimistic: dict[str, Any] = {}
+        # {properties key: task} of the pending confirmations
+        self._confirm_tasks: dict[str, asyncio.Task] = {}
+        self._update_attrs()
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._written_state = self._visible_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the pending confirmations."""
+        await super().async_will_remove_from_hass()
+        for task in self._confirm_tasks.values():
+            task.cancel()
+        self._confirm_tasks.clear()
+        self._optimistic.clear()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        properties = self.entity.properties
+        for field, value in list(self._optimistic.items()):
+            # The poll already reports the controlled value.
+            if properties.get(field) == value:
+                del self._optimistic[field]
+                self._confirm_tasks.pop(field).cancel()
+        self._update_attrs()
+        self._async_write_ha_state_if_changed()
+
+    def _update_attrs(self) -> None:
+        """Materialize the decoded device snapshot into the _attr_* fields.
+
+        HA reads every property several times per state write, they are plain
+        attribute reads afterwards. Absent datapoints become None.
+        """
+        properties = self.entity.properties
+        for attr, field in PROPERTY_ATTRS:
+            setattr(self, attr, properties.get(field))
+        for field, value in self._optimistic.items():
+            setattr(self, PROPERTY_FIELD_ATTRS[field], value)
+        capabilities = self.entity.capabilities
+        for attr, field in CAPABILITY_ATTRS:
+            setattr(self, attr, capabilities.get(field))
+
+    def _visible_state(self) -> tuple:
+        """Everything shown by the entity that a poll or control can change."""
+        return (
+            self.available,
+            *(getattr(self, attr) for attr, _ in PROPERTY_ATTRS),
+            self.entity.capabilities,
         )
-        self._attr_target_humidity = self.entity.properties.get(SERVICE_SET_HUMIDITY)
+
+    @callback
+    def _async_write_ha_state_if_changed(self) -> None:
+        """Write the state only when it differs from the last written one.
+
+        Every write fans out to the state machine, recorder and websocket
+        clients, most polls change nothing for most thermostats.
+        """
+        state = self._visible_state()
+        if state == self._written_state:
+            return
+        self._written_state = state
+        self.async_write_ha_state()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -114,112 +214,17 @@ class MyThermostat(CoordinatorEntity, ClimateEntity):
     def available(self) -> bool:
         return self.hub.online and self.entity.online
 
-    @property
-    def current_humidity(self) -> float | None:
-        return self.entity.properties[ATTR_CURRENT_HUMIDITY]
-
-    @property
-    def current_temperature(self) -> float | None:
-        return self.entity.properties[ATTR_CURRENT_TEMPERATURE]
-
-    @property
-    def fan_mode(self) -> str | None:
-        return self.entity.properties[ATTR_FAN_MODE]
-
-    @property
-    def fan_modes(self) -> list[str] | None:
-        return self.entity.properties[ATTR_FAN_MODES]
-
-    @property
-    def hvac_action(self) -> HVACAction | None:
-        return self.entity.properties[ATTR_HVAC_ACTION]
-
-    @property
-    def hvac_mode(self) -> HVACMode | None:
-        return self.entity.properties[ATTR_HVAC_MODE]
-
-    @property
-    def hvac_modes(self) -> list[HVACMode] | None:
-        return self.entity.properties[ATTR_HVAC_MODES]
-
-    @property
-    def max_humidity(self) -> float | None:
-        return self.entity.properties[ATTR_MAX_HUMIDITY]
-
-    @property
-    def max_temp(self) -> float | None:
-        return self.entity.properties[ATTR_MAX_TEMP]
-
-    @property
-    def min_humidity(self) -> float | None:
-        return self.entity.properties[ATTR_MIN_HUMIDITY]
-
-    @property
-    def min_temp(self) -> float | None:
-        return self.entity.properties[ATTR_MIN_TEMP]
-
-    @property
-    def precision(self) -> float | None:
-        return PRECISION_TENTHS
-
-    @property
-    def preset_mode(self) -> str | None:
-        return self.entity.properties[ATTR_PRESET_MODE]
-
-    @property
-    def preset_modes(self) -> list[str] | None:
-        return self.entity.properties[ATTR_PRESET_MODES]
-
-    @property
-    def target_humidity(self) -> float | None:
-        return self.entity.properties[SERVICE_SET_HUMIDITY]
-
-    @property
-    def target_temperature(self) -> float | None:
-        return self.entity.properties[SERVICE_SET_TEMPERATURE]
-
-    @property
-    def target_temperature_high(self) -> float | None:
-        return self.entity.properties[ATTR_TARGET_TEMP_HIGH]
-
-    @property
-    def target_temperature_low(self) -> float | None:
-        return self.entity.properties[ATTR_TARGET_TEMP_LOW]
-
-    @property
-    def target_temperature_step(self) -> float | None:
-        return self.entity.properties[ATTR_TARGET_TEMP_STEP]
-
-    @property
-    def temperature_unit(self) -> str | None:
-        return UnitOfTemperature.CELSIUS
-
     async def async_set_hvac_mode(self, hvac_mode):
         """Set new target hvac mode."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_HVAC_MODE,
-            hvac_mode,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_HVAC_MODE, hvac_mode)
 
     async def async_turn_on(self):
         """Turn the entity on."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_HVAC_MODE,
-            HVACMode.AUTO,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_HVAC_MODE, HVACMode.AUTO)
 
     async def async_turn_off(self):
         """Turn the entity off."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_HVAC_MODE,
-            HVACMode.OFF,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_HVAC_MODE, HVACMode.OFF)
 
     async def async_toggle(self):
         """Toggle the entity."""
@@ -227,57 +232,72 @@ class MyThermostat(CoordinatorEntity, ClimateEntity):
 
     async def async_set_preset_mode(self, preset_mode):
         """Set new target preset mode."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_PRESET_MODE,
-            preset_mode,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_PRESET_MODE, preset_mode)
 
     async def async_set_fan_mode(self, fan_mode):
         """Set new target fan mode."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_FAN_MODE,
-            fan_mode,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_FAN_MODE, fan_mode)
 
     async def async_set_humidity(self, humidity):
         """Set new target humidity."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_HUMIDITY,
-            humidity,
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_HUMIDITY, humidity)
 
     # Specific Parameter(**kwargs) when invoke async_set_temperature()
     async def async_set_temperature(self, **kwargs: Any):
         """Set new target temperature."""
-        ret = await self.hub.async_device_control(
-            self.entity,
-            SERVICE_SET_TEMPERATURE,
-            kwargs[ATTR_TEMPERATURE],
-        )
-        await self.async_update_state(ret)
+        await self.async_control(SERVICE_SET_TEMPERATURE, kwargs[ATTR_TEMPERATURE])
 
-    async def async_update_state(self, opt_ret: bool):
-        """Update current device state and UI state."""
+    async def async_control(self, service: str, value: Any):
+        """Send a control command and show its value right away.
 
-        if opt_ret:
-            await asyncio.sleep(3)
-            states = await self.hub.async_get_device_states(
-                self.entity.product_id, self.entity.device_id
-            )
-            if states:
-                self.entity.properties.update(states)
-                self.async_write_ha_state()
-            else:
-                raise HomeAssistantError(
-                    f"Failed to request device state {self.entity.device_name}"
-                )
-        else:
+        The value is shown optimistically once the cloud accepted the command.
+        A poll or the confirmation queue of the hub reporting it confirms it,
+        it is rolled back when the device does not report it in time.
+        """
+        ret = await self.hub.async_device_control(self.entity, service, value)
+        if not ret:
             raise HomeAssistantError(
                 f"Failed to control device {self.entity.device_name}"
             )
+        self.coordinator.async_note_control()
+        field = SERVICE_PROPERTIES[service]
+        # Show and confirm what the device will report, not the requested value.
+        value = self.hub.reported_value(self.entity, service, field, value)
+        # A newer command supersedes the confirmation of the previous one.
+        task = self._confirm_tasks.pop(field, None)
+        if task is not None:
+            task.cancel()
+        self._optimistic[field] = value
+        self._confirm_tasks[field] = self.hass.async_create_task(
+            self.async_confirm(field, value)
+        )
+        self._update_attrs()
+        self._async_write_ha_state_if_changed()
+
+    async def async_confirm(self, field: str, value: Any):
+        """Confirm or roll back the optimistic value of 'field'.
+
+        The task is cancelled when a poll confirms the value or a newer
+        command replaces it, those already dropped the optimistic value.
+        """
+        task = asyncio.current_task()
+        confirmed = False
+        try:
+            confirmed = await self.hub.async_confirm_control(
+                self.entity, {field: value}
+            )
+        except Exception as err:
+            logger.warning(
+                f"Failed to confirm {field} of device {self.entity.device_name}: {err}"
+            )
+        finally:
+            if self._confirm_tasks.get(field) is task:
+                del self._confirm_tasks[field]
+                del self._optimistic[field]
+                if not confirmed:
+                    logger.warning(
+                        f"Device {self.entity.device_name} did not report {field} "
+                        f"{value}, rolled back to {self.entity.properties.get(field)}"
+                    )
+                self._update_attrs()
+                self._async_write_ha_state_if_changed()
@@ -23,10 +23,12 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import selector
 
 from .xlink_ptp import PTP, PTPFields, APIAuthError, APIREQUESTError, APIDATAEMPTYError
 from .const import DOMAIN
+from . import async_get_metadata_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -44,11 +46,11 @@ async def validate_login(
 ) -> dict[str, Any]:
     """Validate integrations config flow step 1."""
     try:
-        user_id = await hass.async_add_executor_job(
-            api.user_auth, data[CONF_USERNAME], data[CONF_PASSWORD]
-        )
+        user_id = await api.async_user_auth(data[CONF_USERNAME], data[CONF_PASSWORD])
     except APIAuthError as err:
         raise APIAuthError from err
+    except APIREQUESTError as err:
+        raise APIREQUESTError from err
     except APIDATAEMPTYError as err:
         raise APIDATAEMPTYError from err
     return {"user_id": user_id}
@@ -61,7 +63,7 @@ class ExampleConfigFlow(ConfigFlow, domain=DOMAIN):
     _title: str
 
     def __init__(self):
-        self.api = PTP()
+        self.api: PTP | None = None
         self.username = None
         self.password = None
         self.home_id = None
@@ -75,11 +77,18 @@ class ExampleConfigFlow(ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
 
         if user_input is not None:
+            # Short-lived login client, runs on the shared HA session.
+            self.api = PTP(
+                async_get_clientsession(self.hass),
+                async_get_metadata_cache(self.hass, user_input[CONF_USERNAME]),
+            )
             try:
                 info = await validate_login(self.hass, self.api, user_input)
                 self.user_id = info["user_id"]
             except APIAuthError:
                 errors["base"] = "invalid_auth"
+            except APIREQUESTError:
+                errors["base"] = "cannot_connect"
             except Exception:
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
@@ -95,6 +104,12 @@ class ExampleConfigFlow(ConfigFlow, domain=DOMAIN):
             last_step=False,
         )
 
+    @callback
+    def async_remove(self) -> None:
+        """Stop the token refresh of the login client when the flow ends."""
+        if self.api is not None:
+            self.hass.async_create_task(self.api.async_close())
+
     async def async_step_select_home(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -0,0 +1,141 @@
+"""Coalesced confirmation of control commands.
+
+A control command is accepted by the cloud before the device applied it.
+The devices waiting for their written values are collected and queried
+together, one v_devices request per product id, retrying with a growing
+delay until the values show up or the attempts are exhausted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any
+
+from .const import DeviceEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Confirmation:
+    """A device waiting for written values."""
+
+    __slots__ = ("entity", "expected", "future", "attempt", "due")
+
+    def __init__(
+        self, entity: DeviceEntity, expected: dict, future: asyncio.Future, due: float
+    ) -> None:
+        self.entity = entity
+        self.expected = expected
+        self.future = future
+        self.attempt = 0
+        self.due = due
+
+    def confirmed(self) -> bool:
+        properties = self.entity.properties
+        return all(
+            properties.get(field) == value for field, value in self.expected.items()
+        )
+
+
+class ConfirmationQueue:
+    """Devices waiting for written values, confirmed by batched queries."""
+
+    # delay before each confirmation query of a command, in seconds
+    backoff = (0.3, 1.0, 3.0)
+
+    # confirmations due within this many seconds join a query, in seconds
+    coalesce_window = 0.3
+
+    def __init__(
+        self, query: Callable[[dict[str, list]], Awaitable[dict | None]]
+    ) -> None:
+        """Initiate ConfirmationQueue class.
+
+        :param query: queries and merges the states of {pid: [device ids]}
+            into the device entities, None when the query failed.
+        """
+        self._query = query
+        self._waiting: list[_Confirmation] = []
+        self._task: asyncio.Task | None = None
+        # batched queries sent, for diagnostics
+        self.queries = 0
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    async def async_confirm(
+        self, entity: DeviceEntity, expected: dict[str, Any]
+    ) -> bool:
+        """Wait until the device reports the written values.
+
+        :param expected: {properties key: value} written by the command.
+        :return: True - reported, False - not reported after every attempt.
+        :rtype: bool
+        """
+        loop = asyncio.get_running_loop()
+        confirmation = _Confirmation(
+            entity, expected, loop.create_future(), loop.time() + self.backoff[0]
+        )
+        self._waiting.append(confirmation)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._async_run())
+        return await confirmation.future
+
+    async def _async_run(self):
+        loop = asyncio.get_running_loop()
+        while self._waiting:
+            due = min(confirmation.due for confirmation in self._waiting)
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            window = loop.time() + self.coalesce_window
+            batch = [
+                confirmation
+                for confirmation in self._waiting
+                if confirmation.due <= window and not confirmation.future.done()
+            ]
+            if batch:
+                await self._async_query(batch)
+            batched = set(batch)
+            now = loop.time()
+            waiting = []
+            for confirmation in self._waiting:
+                if confirmation.future.done():
+                    continue
+                if confirmation in batched:
+                    if confirmation.confirmed():
+                        confirmation.future.set_result(True)
+                        continue
+                    confirmation.attempt += 1
+                    if confirmation.attempt >= len(self.backoff):
+                        confirmation.future.set_result(False)
+                        continue
+                    confirmation.due = now + self.backoff[confirmation.attempt]
+                waiting.append(confirmation)
+            self._waiting = waiting
+
+    async def _async_query(self, batch: list[_Confirmation]):
+        pid_to_devices: dict[str, list] = {}
+        for confirmation in batch:
+            entity = confirmation.entity
+            devices = pid_to_devices.setdefault(entity.product_id, [])
+            if entity.device_id not in devices:
+                devices.append(entity.device_id)
+        self.queries += 1
+        try:
+            if await self._query(pid_to_devices) is None:
+                _LOGGER.warning("Failed to request device state for confirmation")
+        except Exception as err:
+            _LOGGER.warning(
+                f"Failed to request device state for confirmation: {err}"
+            )
+
+    async def async_close(self):
+        """Stop confirming, pending commands are reported as not confirmed."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for confirmation in self._waiting:
+            if not confirmation.future.done():
+                confirmation.future.set_result(False)
+        self._waiting.clear()
@@ -1,7 +1,9 @@
 """Constants for the example thermostat integration."""
 
 from enum import StrEnum
-from dataclasses import dataclass
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Any
 
 # This is the internal name of the integration, it should also match the directory
@@ -10,6 +12,12 @@ DOMAIN = "linkedgo_bridge"
 
 DEFAULT_SCAN_INTERVAL = 60
 
+# hass.data key of the per account metadata caches, kept across reloads
+DATA_METADATA_CACHE = "metadata_cache"
+
+# capabilities of a device whose model is not known yet
+NO_CAPABILITIES = MappingProxyType({})
+
 
 @dataclass
 class DeviceEntity:
@@ -24,3 +32,5 @@ class DeviceEntity:
     online: bool
     properties: list[dict[str, Any]]
     raw_data: list[dict[str, Any]]
+    # static capabilities shared by the devices of a model and machine type
+    capabilities: Mapping[str, Any] = field(default_factory=lambda: NO_CAPABILITIES)
@@ -2,8 +2,19 @@
 
 from datetime import timedelta
 import logging
+import time
 from typing import Any
 
+from homeassistant.components.climate import (
+    ATTR_FAN_MODE,
+    ATTR_HVAC_ACTION,
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_TEMPERATURE,
+    HVACAction,
+)
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_HOST,
@@ -11,21 +22,36 @@ from homeassistant.const import (
     CONF_SCAN_INTERVAL,
     CONF_USERNAME,
 )
-from homeassistant.core import DOMAIN, HomeAssistant
+from homeassistant.core import DOMAIN, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .xlink_ptp import PTPFields
 from .hub import Hub
-from .const import DEFAULT_SCAN_INTERVAL, DeviceEntity
+from .const import DEFAULT_SCAN_INTERVAL
+from .device_table import DeviceTable, normalize_device_id
+from .poll_policy import AdaptivePollPolicy
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# properties set by users, a change reported by a poll counts as activity
+SETTING_PROPERTIES = (
+    ATTR_FAN_MODE,
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_TEMPERATURE,
+)
+
+# hvac actions of a device that does not heat, cool or ventilate
+IDLE_ACTIONS = (HVACAction.IDLE, HVACAction.OFF, None)
+
 
 class MyCoordinator(DataUpdateCoordinator):
     """My coordinator."""
 
-    data: list[DeviceEntity]
+    data: DeviceTable
 
     def __init__(
         self, hass: HomeAssistant, config_entry: ConfigEntry, hub: Hub
@@ -37,6 +63,16 @@ class MyCoordinator(DataUpdateCoordinator):
             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
         )
         self.home_id = config_entry.data[PTPFields.HOME_ID]
+        # devices merged by the last poll
+        self.changed_devices = 0
+        # success and cloud availability the listeners were last notified with
+        self._notified_success = None
+        self._notified_online = None
+        self.poll_policy = AdaptivePollPolicy(self.poll_interval)
+        # device ids whose last reported hvac action is not idle
+        self._busy_devices: set[str] = set()
+        # monotonic start of the last successful poll of each product id
+        self._polled_at: dict[str, float] = {}
 
         super().__init__(
             hass,
@@ -55,25 +91,114 @@ class MyCoordinator(DataUpdateCoordinator):
 
         if not self.data:
             self.data = await self.hub.async_get_all_device(self.home_id)
-        devices = {}
-        for entity in self.data:
-            device_id = entity.device_id
-            devices[device_id] = entity.product_id
+            self._busy_devices.clear()
+            self._polled_at.clear()
         try:
-            raw_devices = await self.hub.async_get_all_device_states(devices)
-            if raw_devices:
-                for did, device_state in raw_devices.items():
-                    for entity in self.data:
-                        device_id = entity.device_id
-                        if isinstance(device_id, int):
-                            device_id = str(device_id)
-                        if did == device_id:
-                            properies = device_state["properties"]
-                            entity.properties.update(properies)
-                            entity.raw_data = device_state["raw_data"]
+            self.changed_devices = 0
+            started = time.monotonic()
+            due = self._due_products(started)
+            raw_devices, failed = await self.hub.async_get_all_device_states(due)
+            if due and failed.issuperset(due):
+                raise UpdateFailed(f"Failed to request device state of {due}")
+            # Failed groups keep their last state and stay due.
+            for pid in due:
+                if pid not in failed:
+                    self._polled_at[pid] = started
+            self._track_activity(raw_devices)
+            # Only devices whose raw state changed are in the result.
+            self.changed_devices = self.data.merge(raw_devices)
+            _LOGGER.debug(
+                f"{self.changed_devices} of {len(self.data)} devices changed"
+            )
+            if failed:
+                # Retry the failed groups soon instead of after a decayed interval.
+                self._retry_interval()
             else:
-                _LOGGER.warning("Failed to request device state, result is None")
+                self._adapt_interval()
+        except UpdateFailed:
+            self._retry_interval()
+            raise
         except Exception as err:
+            self._retry_interval()
             raise UpdateFailed(f"Failed to request device state: {err}") from err
         else:
             return self.data
+
+    def _due_products(self, now: float) -> list[str]:
+        """Product ids whose model poll interval has elapsed.
+
+        Models declare the min seconds between polls of their product group,
+        a group is due at the poll closest to that time. Groups not due keep
+        their last merged state.
+        """
+        tick = self.update_interval.total_seconds() if self.update_interval else 0
+        due = []
+        for pid in self.data.by_product:
+            polled_at = self._polled_at.get(pid)
+            if (
+                polled_at is None
+                or now - polled_at >= self.hub.product_poll_interval(pid) - tick / 2
+            ):
+                due.append(pid)
+        return due
+
+    def _track_activity(self, raw_devices: dict[str, dict[str, Any]]):
+        """Note changed settings and busy devices of a poll before merging it."""
+        now = time.monotonic()
+        for device_id, device_state in raw_devices.items():
+            entity = self.data.get(device_id)
+            if entity is None:
+                continue
+            previous = entity.properties
+            properties = device_state["properties"]
+            for key in SETTING_PROPERTIES:
+                value = previous.get(key)
+                if value is not None and value != properties.get(key):
+                    # Changed at the device or by another app.
+                    self.poll_policy.note_activity(now)
+                    break
+            device_id = normalize_device_id(device_id)
+            if properties.get(ATTR_HVAC_ACTION) in IDLE_ACTIONS:
+                self._busy_devices.discard(device_id)
+            else:
+                self._busy_devices.add(device_id)
+
+    def _adapt_interval(self):
+        """Set the interval until the next poll from the poll policy."""
+        interval = self.poll_policy.next_interval(
+            time.monotonic(),
+            dt_util.now().hour,
+            changed=bool(self.changed_devices),
+            all_idle=not self._busy_devices,
+        )
+        self.update_interval = timedelta(seconds=interval)
+        _LOGGER.debug(f"Next poll in {interval:.0f}s")
+
+    def _retry_interval(self):
+        """Retry a failed poll at the base interval, the decay restarts."""
+        interval = self.poll_policy.retry_interval(time.monotonic())
+        self.update_interval = timedelta(seconds=interval)
+
+    @callback
+    def async_note_control(self):
+        """Poll quickly after a control command, starting with the next poll."""
+        self.poll_policy.note_activity(time.monotonic())
+        fast = timedelta(seconds=self.poll_policy.fast_interval)
+        if self.update_interval is None or self.update_interval > fast:
+            self.update_interval = fast
+            self._schedule_refresh()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the entities, unless the last poll changed nothing they show."""
+        online = self.hub.online
+        if (
+            not self.changed_devices
+            and self.last_update_success
+            and self._notified_success
+            and online == self._notified_online
+        ):
+            return
+        self._notified_success = self.last_update_success
+        self._notified_online = online
+        super().async_update_listeners()
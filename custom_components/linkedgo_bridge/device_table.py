@@ -0,0 +1,99 @@
+"""Persistent table of the devices of a home.
+
+Devices are keyed by their normalized device id, the cloud reports ids as
+int in the device list and as int or str in state queries. A product id ->
+device ids index is maintained alongside, so a poll can be sent per product
+group and merged back without scanning the table.
+"""
+
+from collections.abc import Iterator
+from typing import Any
+
+from .const import DeviceEntity
+
+
+def normalize_device_id(device_id: Any) -> str:
+    """Key of a device id in the table, ids are compared as str."""
+    return device_id if isinstance(device_id, str) else str(device_id)
+
+
+class DeviceTable:
+    """Devices of a home, indexed by device id and by product id."""
+
+    def __init__(self, devices: list[DeviceEntity] | None = None) -> None:
+        """Initiate DeviceTable class."""
+        self._entities: dict[str, DeviceEntity] = {}
+        self._by_product: dict[str, list] = {}
+        if devices:
+            self.replace(devices)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __iter__(self) -> Iterator[DeviceEntity]:
+        return iter(self._entities.values())
+
+    def __contains__(self, device_id: Any) -> bool:
+        return normalize_device_id(device_id) in self._entities
+
+    @property
+    def by_product(self) -> dict[str, list]:
+        """Device ids grouped by product id, as reported by the cloud.
+
+        The returned dict is the live index, callers must not modify it.
+        """
+        return self._by_product
+
+    def get(self, device_id: Any) -> DeviceEntity | None:
+        """Return the device of 'device_id', None when unknown."""
+        return self._entities.get(normalize_device_id(device_id))
+
+    def add(self, entity: DeviceEntity):
+        """Add a device, a known device id is replaced."""
+        key = normalize_device_id(entity.device_id)
+        if key in self._entities:
+            self.remove(key)
+        self._entities[key] = entity
+        self._by_product.setdefault(entity.product_id, []).append(entity.device_id)
+
+    def remove(self, device_id: Any) -> DeviceEntity | None:
+        """Remove a device.
+
+        :return: the removed device, None when unknown.
+        :rtype: DeviceEntity
+        """
+        entity = self._entities.pop(normalize_device_id(device_id), None)
+        if entity is None:
+            return None
+        group = self._by_product[entity.product_id]
+        group.remove(entity.device_id)
+        if not group:
+            del self._by_product[entity.product_id]
+        return entity
+
+    def replace(self, devices: list[DeviceEntity]):
+        """Replace the whole table with a freshly downloaded device list."""
+        self._entities.clear()
+        self._by_product.clear()
+        for entity in devices:
+            self.add(entity)
+
+    def merge(self, devices_state: dict[str, dict]) -> int:
+        """Merge a poll result into the devices of the table.
+
+        :param devices_state: {"device_id": {"properties": {}, "raw_data": {},
+            "capabilities": {}}}.
+        :return: number of merged devices, unknown device ids are ignored.
+        :rtype: int
+        """
+        entities = self._entities
+        merged = 0
+        for device_id, device_state in devices_state.items():
+            entity = entities.get(normalize_device_id(device_id))
+            if entity is None:
+                continue
+            entity.properties.update(device_state["properties"])
+            entity.raw_data = device_state["raw_data"]
+            entity.capabilities = device_state["capabilities"]
+            merged += 1
+        return merged
@@ -0,0 +1,37 @@
+"""Diagnostics support for the Linkedgo bridge integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from . import MyConfigEntry
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, "user_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: MyConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = config_entry.runtime_data.coordinator
+    hub = coordinator.hub
+    api = hub.ptp.api
+    return {
+        "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "transport": {
+            "online": api.online,
+            "circuit_state": api.circuit_breaker.state,
+            "codec": api.codec.name,
+        },
+        "scheduler": hub.scheduler_stats(),
+        "polling": {
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "policy": coordinator.poll_policy.as_dict(),
+        },
+        "endpoints": api.metrics.as_dict(),
+        "metadata_cache": api.metadata_cache.as_dict(),
+    }
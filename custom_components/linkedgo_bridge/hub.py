@@ -8,7 +8,9 @@ from __future__ import annotations
 # for more information.
 # This dummy hub always returns 3 rollers.
 import asyncio
+from collections import Counter
 import random
+import time
 from typing import Any
 from homeassistant.core import HomeAssistant
 from homeassistant.const import (
@@ -16,6 +18,9 @@ from homeassistant.const import (
 )
 from .xlink_ptp import PTP
 from .const import DeviceEntity
+from .device_table import DeviceTable, normalize_device_id
+from .confirmation import ConfirmationQueue
+from .xlink_scheduler import RequestPriority, prioritized
 
 
 class Hub:
@@ -27,31 +32,161 @@ class Hub:
         """Init dummy hub."""
         self._hass = hass
         self._callbacks = set()
-        self.online = True
         self.ptp = ptp
+        self.devices = DeviceTable()
+        self.confirmations = ConfirmationQueue(self._async_query_confirmations)
+        # control writes in flight per device id
+        self._writes_in_flight: Counter = Counter()
+        # monotonic time the last control write of a device id completed
+        self._written_at: dict[str, float] = {}
+        # polled states dropped because a write raced with the poll
+        self.stale_states_dropped = 0
 
-    async def async_get_all_device(self, home_id) -> list[DeviceEntity]:
-        """Fetch and normalize state for all supported devices."""
-        return await self.ptp.async_home_device(home_id)
+    @property
+    def online(self) -> bool:
+        """Cloud connection state, follows the transport circuit breaker."""
+        return self.ptp.online
 
-    async def async_get_all_device_states(self, devices: dict) -> list[dict[str, Any]]:
-        """Fetch and normalize state for all supported devices."""
-        return await self.ptp.async_batch_device_state(devices)
+    async def async_get_all_device(self, home_id) -> DeviceTable:
+        """Download the device list of a home into the device table."""
+        self.devices.replace(await self.ptp.async_home_device(home_id))
+        # New entities start without state, decode every device once.
+        self.ptp.forget_states()
+        return self.devices
 
-    async def async_get_device_states(self, pid: str, did: str) -> dict[str, Any]:
-        devices = {}
-        did = did if isinstance(did, str) else str(did)
-        devices[did] = pid
-        raw_devices = await self.ptp.async_batch_device_state(devices)
-        if did in raw_devices:
-            return raw_devices[did]["properties"]
-        return None
+    def remove_device(self, device_id) -> DeviceEntity | None:
+        """Remove a device from the device table and forget its polled state.
+
+        :return: the removed device, None when unknown.
+        :rtype: DeviceEntity
+        """
+        entity = self.devices.remove(device_id)
+        self.ptp.forget_states([normalize_device_id(device_id)])
+        return entity
+
+    async def async_get_all_device_states(
+        self, product_ids: list[str] | None = None
+    ) -> tuple[dict[str, dict[str, Any]], set[str]]:
+        """Fetch and normalize state for all devices of the device table.
+
+        Polls run at background priority, devices controlled while the poll
+        was running are left out, see _drop_stale_states.
+
+        :param product_ids: product groups to poll, None for all of them.
+        :return: (states of the answered devices, product ids that failed).
+        :rtype: tuple
+        """
+        pid_to_devices = self.devices.by_product
+        if product_ids is not None:
+            pid_to_devices = {
+                pid: pid_to_devices[pid]
+                for pid in product_ids
+                if pid in pid_to_devices
+            }
+        started = time.monotonic()
+        with prioritized(RequestPriority.BACKGROUND):
+            raw_devices, failed = await self.ptp.async_batch_device_state(
+                pid_to_devices
+            )
+        return self._drop_stale_states(raw_devices, started), failed
+
+    def _drop_stale_states(
+        self, raw_devices: dict[str, dict[str, Any]], started: float
+    ) -> dict[str, dict[str, Any]]:
+        """Drop the states of devices written since the query 'started'.
+
+        Such a state may predate the write, merging it would show the old
+        values again. The poll forgets them, so the next one decodes them.
+        """
+        if not raw_devices:
+            return raw_devices
+        stale = [
+            did
+            for did in raw_devices
+            if self._writes_in_flight[did] or self._written_at.get(did, 0) > started
+        ]
+        if stale:
+            for did in stale:
+                del raw_devices[did]
+            self.ptp.forget_states(stale)
+            self.stale_states_dropped += len(stale)
+        return raw_devices
+
+    def product_poll_interval(self, pid: str) -> float:
+        """Min seconds between polls of a product group."""
+        return self.ptp.product_poll_interval(pid)
+
+    def reported_value(
+        self, entity: DeviceEntity, service: str, field: str, value: Any
+    ) -> Any:
+        """Value of 'field' the device reports once 'service' wrote 'value'."""
+        return self.ptp.reported_value(entity, service, field, value)
+
+    async def async_confirm_control(
+        self, entity: DeviceEntity, expected: dict[str, Any]
+    ) -> bool:
+        """Wait until a controlled device reports the written properties.
+
+        Devices confirmed at about the same time share one query per product.
+
+        :param expected: {properties key: value} written by the command.
+        :return: True - reported, False - not reported in time.
+        :rtype: bool
+        """
+        with prioritized(RequestPriority.INTERACTIVE):
+            return await self.confirmations.async_confirm(entity, expected)
+
+    async def _async_query_confirmations(
+        self, pid_to_devices: dict[str, list]
+    ) -> dict[str, dict[str, Any]] | None:
+        started = time.monotonic()
+        raw_devices, failed = await self.ptp.async_batch_device_state(
+            pid_to_devices, only_changed=False
+        )
+        raw_devices = self._drop_stale_states(raw_devices, started)
+        if raw_devices:
+            self.devices.merge(raw_devices)
+            # The polled fingerprints predate this merge, a poll must not skip
+            # these devices when they return to their last polled state.
+            self.ptp.forget_states(list(raw_devices))
+        if failed:
+            return None
+        return raw_devices
 
     async def async_device_control(
         self, entity: DeviceEntity, property: str, value: Any
     ) -> bool:
-        """Set device property."""
-        return await self.ptp.async_device_control(entity, property, value)
+        """Set device property.
+
+        Commands run at interactive priority, ahead of polls and metadata
+        fetches. Writes of a device are serialized by PTP.
+        """
+        did = normalize_device_id(entity.device_id)
+        self._writes_in_flight[did] += 1
+        try:
+            with prioritized(RequestPriority.INTERACTIVE):
+                return await self.ptp.async_device_control(entity, property, value)
+        finally:
+            self._writes_in_flight[did] -= 1
+            if not self._writes_in_flight[did]:
+                del self._writes_in_flight[did]
+            self._written_at[did] = time.monotonic()
+
+    def scheduler_stats(self) -> dict[str, Any]:
+        """Queue depth and wait time of the requests, for diagnostics."""
+        return {
+            "requests": self.ptp.api.scheduler_stats(),
+            "writes_in_flight": sum(self._writes_in_flight.values()),
+            "coalesced_writes": self.ptp.coalesced_writes,
+            "pending_confirmations": len(self.confirmations),
+            "confirmation_queries": self.confirmations.queries,
+            "stale_states_dropped": self.stale_states_dropped,
+        }
+
+    async def async_close(self) -> None:
+        """Close the connection to the cloud."""
+        await self.confirmations.async_close()
+        await self.ptp.async_close()
 
     def register_callback(self, callback: Callable[[], None]) -> None:
         """Register callback, called when Roller changes state."""
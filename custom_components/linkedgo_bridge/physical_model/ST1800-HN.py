@@ -56,6 +56,18 @@ from homeassistant.components.climate import (
     DOMAIN as CLIMATE_DOMAIN,
 )
 
+from .datapoint import (
+    AnyBits,
+    Eq,
+    Mapped,
+    Rules,
+    Scaled,
+    When,
+    compile_capabilities,
+    compile_decoder,
+)
+from .columnar import compile_columnar_decoder
+
 
 class ST830:
     """Physical mode, mode: ST1800-HN, pid: 1603bec1cd5903e91603bec1cd599801."""
@@ -71,88 +83,14 @@ class ST830:
     bran = "linkedgo"
     device_name = "thermostat ST1800-HN"
 
+    # min seconds between polls of the product group, floor heating changes
+    # slowly
+    poll_interval = 300
+
     def __init__(self) -> None:
         """Initiate ST1800-HN physical model class."""
         pass
 
-    @staticmethod
-    def attr_current_humidity(state: dict) -> tuple:
-        if "21" in state:
-            value = state["21"]
-            value = value / 10
-            return (True, value)
-        return (False, None)
-
-    @staticmethod
-    def attr_current_temperature(state: dict) -> tuple:
-        if "20" in state:
-            value = state["20"]
-            value = value / 10
-            return (True, value)
-        return (False, None)
-
-    @staticmethod
-    def attr_hvac_action(state: dict) -> tuple:
-        if "0" in state and "23" in state:
-            switch = state["0"]
-            idle_bit = state["23"]
-            if switch == 0:
-                return (True, HVACAction.OFF)
-            elif switch == 1:
-                # bit6: cooling standby; bit7: heating standby.
-                if (idle_bit & 0x40) > 0:
-                    return (True, HVACAction.IDLE)
-                else:
-                    return (True, HVACAction.HEATING)
-            return (False, None)
-        return (False, None)
-
-    @staticmethod
-    def attr_hvac_mode(state: dict) -> tuple:
-        if "0" in state:
-            switch = state["0"]
-            if switch == 0:
-                return (True, HVACMode.OFF)
-            else:
-                return (True, HVACMode.HEAT)
-        return (False, None)
-
-    @staticmethod
-    def attr_hvac_modes(state: dict) -> tuple:
-        hvac_modes = [
-            HVACMode.OFF,
-            HVACMode.HEAT,
-        ]
-        return (True, hvac_modes)
-
-    @staticmethod
-    def attr_max_temp(state: dict) -> tuple:
-        return (True, 50)
-
-    @staticmethod
-    def attr_min_temp(state: dict) -> tuple:
-        return (True, 5)
-
-    @staticmethod
-    def attr_target_temperature(state: dict) -> tuple:
-        if "1" in state:
-            value = state["1"]
-            value = value / 10
-            return (True, value)
-        return (False, None)
-
-    @staticmethod
-    def attr_target_temperature_high(state: dict) -> tuple:
-        return (True, 50)
-
-    @staticmethod
-    def attr_target_temperature_low(state: dict) -> tuple:
-        return (True, 5)
-
-    @staticmethod
-    def attr_target_temperature_step(state: dict) -> tuple:
-        return (True, 0.5)
-
     @staticmethod
     def service_set_hvac_mode(entity: Any, value: Any) -> tuple:
         enum_v = {
@@ -171,20 +109,35 @@ class ST830:
             return (True, dp)
         return (False, None)
 
-    attributes = {
-        ATTR_CURRENT_HUMIDITY: attr_current_humidity,
-        ATTR_CURRENT_TEMPERATURE: attr_current_temperature,
-        ATTR_HVAC_ACTION: attr_hvac_action,
-        ATTR_HVAC_MODE: attr_hvac_mode,
-        ATTR_HVAC_MODES: attr_hvac_modes,
-        ATTR_MAX_TEMP: attr_max_temp,
-        ATTR_MIN_TEMP: attr_min_temp,
-        SERVICE_SET_TEMPERATURE: attr_target_temperature,
-        ATTR_TARGET_TEMP_HIGH: attr_target_temperature_high,
-        ATTR_TARGET_TEMP_LOW: attr_target_temperature_low,
-        ATTR_TARGET_TEMP_STEP: attr_target_temperature_step,
+    datapoints = {
+        ATTR_CURRENT_HUMIDITY: Scaled("21", 10),
+        ATTR_CURRENT_TEMPERATURE: Scaled("20", 10),
+        ATTR_HVAC_ACTION: Rules(
+            (
+                When(HVACAction.OFF, (Eq("0", 0),)),
+                # bit6: standby.
+                When(HVACAction.IDLE, (Eq("0", 1), AnyBits("23", 0x40))),
+                When(HVACAction.HEATING, (Eq("0", 1),)),
+            ),
+            requires=("0", "23"),
+        ),
+        ATTR_HVAC_MODE: Mapped("0", {0: HVACMode.OFF}, default=HVACMode.HEAT),
+        SERVICE_SET_TEMPERATURE: Scaled("1", 10),
+    }
+
+    capabilities = {
+        ATTR_HVAC_MODES: [HVACMode.OFF, HVACMode.HEAT],
+        ATTR_MAX_TEMP: 50,
+        ATTR_MIN_TEMP: 5,
+        ATTR_TARGET_TEMP_HIGH: 50,
+        ATTR_TARGET_TEMP_LOW: 5,
+        ATTR_TARGET_TEMP_STEP: 0.5,
     }
 
+    decode = staticmethod(compile_decoder(datapoints, "decode_ST1800_HN"))
+    decode_columns = staticmethod(compile_columnar_decoder(datapoints, decode))
+    descriptor = staticmethod(compile_capabilities(capabilities))
+
     services = {
         SERVICE_SET_HVAC_MODE: service_set_hvac_mode,
         SERVICE_SET_TEMPERATURE: service_set_temperature,
@@ -0,0 +1,240 @@
+"""Physical model shared by the air unit thermostats ST2000 and ST830."""
+
+from typing import Any
+
+from homeassistant.components.climate import (
+    ATTR_CURRENT_HUMIDITY,
+    ATTR_CURRENT_TEMPERATURE,
+    ATTR_FAN_MODES,
+    ATTR_FAN_MODE,
+    ATTR_PRESET_MODE,
+    ATTR_PRESET_MODES,
+    ATTR_MAX_HUMIDITY,
+    ATTR_MIN_HUMIDITY,
+    ATTR_MAX_TEMP,
+    ATTR_MIN_TEMP,
+    ATTR_HVAC_ACTION,
+    ATTR_HVAC_MODES,
+    ATTR_HVAC_MODE,
+    ATTR_TARGET_TEMP_HIGH,
+    ATTR_TARGET_TEMP_LOW,
+    ATTR_TARGET_TEMP_STEP,
+    FAN_ON,
+    FAN_AUTO,
+    FAN_LOW,
+    FAN_MEDIUM,
+    FAN_HIGH,
+    FAN_TOP,
+    FAN_FOCUS,
+    PRESET_NONE,
+    PRESET_SLEEP,
+    SERVICE_SET_FAN_MODE,
+    SERVICE_SET_PRESET_MODE,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_HVAC_MODE,
+    SERVICE_SET_TEMPERATURE,
+    HVACAction,
+    HVACMode,
+    ClimateEntityFeature,
+    DOMAIN as CLIMATE_DOMAIN,
+)
+
+from .columnar import compile_columnar_decoder
+from .datapoint import (
+    AnyBits,
+    Dependent,
+    Eq,
+    Mapped,
+    Rules,
+    Scaled,
+    When,
+    compile_capabilities,
+    compile_decoder,
+)
+
+# fan mode (dp 6) tables, chosen by machine type (dp 2)
+ALTERNATING_FAN_MODES = {0: FAN_AUTO, 1: FAN_LOW, 2: FAN_MEDIUM, 3: FAN_HIGH}
+DIRECT_FAN_MODES = {
+    0: FAN_AUTO,
+    1: FAN_FOCUS,
+    2: FAN_LOW,
+    3: FAN_MEDIUM,
+    4: FAN_HIGH,
+    5: FAN_TOP,
+}
+DEFAULT_FAN_MODES = {1: FAN_LOW, 2: FAN_MEDIUM, 3: FAN_HIGH}
+
+FAN_TABLES = (
+    ((0, 3, 4, 5, 15, 18), ALTERNATING_FAN_MODES),
+    ((1, 6, 7, 8, 16, 19, 20, 21, 22, 23, 24, 25, 82), DIRECT_FAN_MODES),
+    ((80,), DEFAULT_FAN_MODES),
+)
+
+AIR_UNIT_DATAPOINTS = {
+    ATTR_CURRENT_HUMIDITY: Scaled("117", 10),
+    ATTR_CURRENT_TEMPERATURE: Scaled("116", 10),
+    ATTR_FAN_MODE: Dependent("2", FAN_TABLES, ALTERNATING_FAN_MODES, index="6"),
+    ATTR_HVAC_ACTION: Rules(
+        (
+            When(HVACAction.OFF, (Eq("0", 0),)),
+            # bit6: cooling standby; bit7: heating standby.
+            When(HVACAction.IDLE, (Eq("0", 1), AnyBits("130", 0xC0))),
+            When(HVACAction.COOLING, (Eq("0", 1), Eq("1", 0))),
+            When(HVACAction.HEATING, (Eq("0", 1), Eq("1", 1))),
+        ),
+        requires=("0", "1", "130"),
+    ),
+    ATTR_HVAC_MODE: Rules(
+        (
+            When(HVACMode.OFF, (Eq("0", 0),)),
+            When(HVACMode.DRY, (Eq("3", 3),)),
+            When(HVACMode.FAN_ONLY, (Eq("3", 7),)),
+            When(HVACMode.COOL, (Eq("1", 0),)),
+            When(HVACMode.HEAT, (Eq("1", 1),)),
+        )
+    ),
+    ATTR_PRESET_MODE: Mapped("4", {1: PRESET_SLEEP}, default=PRESET_NONE),
+    SERVICE_SET_HUMIDITY: Scaled("8"),
+    SERVICE_SET_TEMPERATURE: Scaled("7", 10),
+}
+
+AIR_UNIT_CAPABILITIES = {
+    ATTR_FAN_MODES: Dependent("2", FAN_TABLES, ALTERNATING_FAN_MODES),
+    ATTR_HVAC_MODES: [
+        HVACMode.OFF,
+        HVACMode.DRY,
+        HVACMode.FAN_ONLY,
+        HVACMode.COOL,
+        HVACMode.HEAT,
+    ],
+    ATTR_MAX_HUMIDITY: 75,
+    ATTR_MIN_HUMIDITY: 40,
+    ATTR_MAX_TEMP: 35,
+    ATTR_MIN_TEMP: 5,
+    ATTR_PRESET_MODES: [PRESET_NONE, PRESET_SLEEP],
+    ATTR_TARGET_TEMP_HIGH: 35,
+    ATTR_TARGET_TEMP_LOW: 5,
+    ATTR_TARGET_TEMP_STEP: 0.5,
+}
+
+
+class AirUnit:
+    """Physical mode of the air unit thermostats.
+
+    The model classes of ST2000.py and ST830.py only add 'model' and
+    'device_name', decoders and services are shared.
+    """
+
+    ha_type = CLIMATE_DOMAIN
+    ha_supported_features = (
+        ClimateEntityFeature.TARGET_TEMPERATURE
+        | ClimateEntityFeature.TARGET_TEMPERATURE_RANGE
+        | ClimateEntityFeature.TARGET_HUMIDITY
+        | ClimateEntityFeature.FAN_MODE
+        | ClimateEntityFeature.PRESET_MODE
+        | ClimateEntityFeature.TURN_ON
+        | ClimateEntityFeature.TURN_OFF
+    )
+    bran = "linkedgo"
+
+    # min seconds between polls of the product group, 0 polls it at every
+    # coordinator update, air units change quickly
+    poll_interval = 0
+
+    def __init__(self) -> None:
+        """Initiate air unit physical model class."""
+        pass
+
+    @staticmethod
+    def service_set_hvac_mode(entity: Any, value: Any) -> tuple:
+        enum_v = {
+            HVACMode.OFF: [{"index": 0, "value": 0}],
+            HVACMode.HEAT: [{"index": 0, "value": 1}, {"index": 1, "value": 1}],
+            HVACMode.COOL: [{"index": 0, "value": 1}, {"index": 1, "value": 0}],
+            HVACMode.HEAT_COOL: [{"index": 0, "value": 1}],
+            HVACMode.DRY: [{"index": 0, "value": 1}, {"index": 3, "value": 3}],
+            HVACMode.FAN_ONLY: [{"index": 0, "value": 1}, {"index": 3, "value": 7}],
+        }
+        if value in enum_v:
+            dp = enum_v[value]
+            return (True, dp)
+        return (False, None)
+
+    @staticmethod
+    def service_set_preset_mode(entity: Any, value: Any) -> tuple:
+        enum_v = {
+            PRESET_NONE: [{"index": 4, "value": 0}],
+            PRESET_SLEEP: [{"index": 4, "value": 1}],
+        }
+        if value in enum_v:
+            dp = enum_v[value]
+            return (True, dp)
+        return (False, None)
+
+    @staticmethod
+    def service_set_fan_mode(entity: Any, value: Any) -> tuple:
+        alternating = {
+            FAN_ON: [{"index": 6, "value": 0}],
+            FAN_AUTO: [{"index": 6, "value": 0}],
+            FAN_LOW: [{"index": 6, "value": 1}],
+            FAN_MEDIUM: [{"index": 6, "value": 2}],
+            FAN_HIGH: [{"index": 6, "value": 3}],
+        }
+        direct = {
+            FAN_ON: [{"index": 6, "value": 0}],
+            FAN_AUTO: [{"index": 6, "value": 0}],
+            FAN_FOCUS: [{"index": 6, "value": 1}],
+            FAN_LOW: [{"index": 6, "value": 2}],
+            FAN_MEDIUM: [{"index": 6, "value": 3}],
+            FAN_HIGH: [{"index": 6, "value": 3}],
+            FAN_TOP: [{"index": 6, "value": 2}],
+        }
+        default = {
+            FAN_ON: [{"index": 6, "value": 1}],
+            FAN_LOW: [{"index": 6, "value": 1}],
+            FAN_MEDIUM: [{"index": 6, "value": 2}],
+            FAN_HIGH: [{"index": 6, "value": 3}],
+        }
+        enum_v = alternating
+        state = entity.raw_data
+        if "2" in state:
+            machine_type = state["2"]
+            if machine_type in [0, 3, 4, 5, 15, 18]:
+                enum_v = alternating
+            elif machine_type in [1, 6, 7, 8, 16, 19, 20, 21, 22, 23, 24, 25, 82]:
+                enum_v = direct
+            elif machine_type == 80:
+                enum_v = default
+        if value in enum_v:
+            dp = enum_v[value]
+            return (True, dp)
+        return (False, None)
+
+    @staticmethod
+    def service_set_humidity(entity: Any, value: Any) -> tuple:
+        if value >= 40 and value <= 75:
+            dp = [{"index": 8, "value": value}]
+            return (True, dp)
+        return (False, None)
+
+    @staticmethod
+    def service_set_temperature(entity: Any, value: Any) -> tuple:
+        if value >= 5 and value <= 35:
+            dp = [{"index": 7, "value": (value * 10)}]
+            return (True, dp)
+        return (False, None)
+
+    datapoints = AIR_UNIT_DATAPOINTS
+    capabilities = AIR_UNIT_CAPABILITIES
+
+    decode = staticmethod(compile_decoder(datapoints, "decode_air_unit"))
+    decode_columns = staticmethod(compile_columnar_decoder(datapoints, decode))
+    descriptor = staticmethod(compile_capabilities(capabilities))
+
+    services = {
+        SERVICE_SET_HVAC_MODE: service_set_hvac_mode,
+        SERVICE_SET_PRESET_MODE: service_set_preset_mode,
+        SERVICE_SET_FAN_MODE: service_set_fan_mode,
+        SERVICE_SET_HUMIDITY: service_set_humidity,
+        SERVICE_SET_TEMPERATURE: service_set_temperature,
+    }
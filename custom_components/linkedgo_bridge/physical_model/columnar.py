@@ -0,0 +1,262 @@
+"""Columnar decode of a whole product group with numpy.
+
+The states of a v_devices response are turned into one int64 column per
+datapoint index and the datapoint specs of the model are evaluated as
+vectorized operations. Rows the columns can not represent exactly (absent
+datapoints, non int values, floats beyond 2**53 or a field without value)
+are decoded by the scalar decoder, so the result always equals
+[decode(state) for state in states].
+
+numpy is optional, without it the columnar decoder is the scalar loop.
+"""
+
+from collections.abc import Callable
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import Any
+
+from .datapoint import (
+    MISSING,
+    AnyBits,
+    Constant,
+    Dependent,
+    Eq,
+    Mapped,
+    Rules,
+    Scaled,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ints beyond are not exact as float64, their rows are decoded scalar
+MAX_EXACT_INT = 2**53
+
+
+def _is_int(value: Any) -> bool:
+    return type(value) is int
+
+
+def _supported(spec: Any) -> bool:
+    """Whether 'spec' compares datapoints with plain ints only."""
+    if isinstance(spec, Constant):
+        return True
+    if isinstance(spec, Scaled):
+        return isinstance(spec.scale, (int, float)) and spec.scale != 0
+    if isinstance(spec, Mapped):
+        return all(map(_is_int, spec.values))
+    if isinstance(spec, Dependent):
+        return all(
+            all(map(_is_int, selector_values)) and all(map(_is_int, table))
+            for selector_values, table in spec.choices
+        ) and all(map(_is_int, spec.default))
+    if isinstance(spec, Rules):
+        return all(
+            _is_int(condition.value if isinstance(condition, Eq) else condition.mask)
+            for rule in spec.rules
+            for condition in rule.conditions
+        )
+    return False
+
+
+def _indices(spec: Any) -> list[str]:
+    """Datapoint indices read by 'spec'."""
+    if isinstance(spec, (Scaled, Mapped)):
+        return [spec.index]
+    if isinstance(spec, Dependent):
+        return [spec.selector] + ([spec.index] if spec.index is not None else [])
+    if isinstance(spec, Rules):
+        return list(spec.requires) + [
+            condition.index for rule in spec.rules for condition in rule.conditions
+        ]
+    return []
+
+
+def _objects(values: list) -> "np.ndarray":
+    """1-d object array of 'values', lists are kept as elements."""
+    array = np.empty(len(values), dtype=object)
+    for position, value in enumerate(values):
+        array[position] = value
+    return array
+
+
+class _ColumnarField:
+    """Vectorized evaluation of one datapoint spec."""
+
+    def __init__(self, spec: Any) -> None:
+        self.spec = spec
+        if isinstance(spec, Mapped):
+            objects = list(spec.values.values())
+            self.default_code = -1
+            if spec.default is not MISSING:
+                self.default_code = len(objects)
+                objects.append(spec.default)
+            self.objects = _objects(objects)
+        elif isinstance(spec, Dependent):
+            # Same selection as the scalar decoder, the first choice wins.
+            tables: list[dict] = []
+            selection: dict[int, int] = {}
+            for selector_values, table in spec.choices:
+                tables.append(table)
+                for selector_value in selector_values:
+                    selection.setdefault(selector_value, len(tables) - 1)
+            tables.append(spec.default)
+            self.selection = selection
+            self.default_table = len(tables) - 1
+            if spec.index is None:
+                self.objects = _objects([list(table.values()) for table in tables])
+            else:
+                objects = []
+                self.entries = []
+                for table_code, table in enumerate(tables):
+                    for raw, value in table.items():
+                        self.entries.append((table_code, raw, len(objects)))
+                        objects.append(value)
+                self.objects = _objects(objects)
+        elif isinstance(spec, Rules):
+            self.objects = _objects([rule.value for rule in spec.rules])
+
+    def evaluate(self, columns: dict, size: int) -> tuple[Any, Any]:
+        """Values of the field for every row.
+
+        :return: (values, rows with a value or None when all have one).
+        :rtype: tuple
+        """
+        spec = self.spec
+        if isinstance(spec, Constant):
+            return repeat(spec.value, size), None
+        if isinstance(spec, Scaled):
+            column = columns[spec.index]
+            if spec.scale == 1:
+                return column.tolist(), None
+            return (column / spec.scale).tolist(), None
+        if isinstance(spec, Mapped):
+            column = columns[spec.index]
+            codes = np.full(size, self.default_code)
+            for code, raw in enumerate(spec.values):
+                codes[column == raw] = code
+            return self._take(codes)
+        if isinstance(spec, Dependent):
+            table_codes = np.full(size, self.default_table)
+            selector = columns[spec.selector]
+            for selector_value, table_code in self.selection.items():
+                table_codes[selector == selector_value] = table_code
+            if spec.index is None:
+                return self.objects[table_codes].tolist(), None
+            column = columns[spec.index]
+            codes = np.full(size, -1)
+            for table_code, raw, code in self.entries:
+                codes[(table_codes == table_code) & (column == raw)] = code
+            return self._take(codes)
+        conditions = []
+        for rule in spec.rules:
+            condition = np.ones(size, dtype=bool)
+            for term in rule.conditions:
+                column = columns[term.index]
+                if isinstance(term, AnyBits):
+                    condition &= (column & term.mask) > 0
+                else:
+                    condition &= column == term.value
+            conditions.append(condition)
+        codes = np.select(conditions, list(range(len(conditions))), default=-1)
+        return self._take(codes)
+
+    def _take(self, codes: "np.ndarray") -> tuple[list, "np.ndarray"]:
+        found = codes >= 0
+        return self.objects[np.where(found, codes, 0)].tolist(), found
+
+
+def compile_columnar_decoder(
+    datapoints: dict[str, Any], decode: Callable[[dict], dict]
+) -> Callable[[list[dict]], list[dict]]:
+    """Compile the datapoint specs of a model into a columnar decoder.
+
+    :param datapoints: {field: spec} in report order.
+    :param decode: scalar decoder of the same specs, used for irregular rows.
+    :return: function decoding a list of raw states into a list of properties.
+    :rtype: Callable
+    """
+    if np is None or not all(map(_supported, datapoints.values())):
+
+        def decode_rows(states: list[dict]) -> list[dict]:
+            return [decode(state) for state in states]
+
+        return decode_rows
+
+    fields = list(datapoints)
+    specs = [_ColumnarField(spec) for spec in datapoints.values()]
+    indices = list(
+        dict.fromkeys(index for spec in datapoints.values() for index in _indices(spec))
+    )
+    getter = itemgetter(*indices) if indices else None
+
+    def read_columns(states: list[dict], size: int) -> tuple[dict, Any] | None:
+        """One int64 column per index and the rows holding plain ints only.
+
+        :return: (columns, regular rows), None when a value overflows int64.
+        :rtype: tuple
+        """
+        if len(indices) > 1:
+            # Fast path, every state carries every index as a plain int.
+            try:
+                rows = list(map(getter, states))
+            except KeyError:
+                rows = None
+            if rows is not None and set(map(type, chain.from_iterable(rows))) == {
+                int
+            }:
+                try:
+                    matrix = np.array(rows, dtype=np.int64)
+                except OverflowError:
+                    return None
+                regular = ((matrix > -MAX_EXACT_INT) & (matrix < MAX_EXACT_INT)).all(
+                    axis=1
+                )
+                columns = {
+                    index: matrix[:, position] for position, index in enumerate(indices)
+                }
+                return columns, regular
+
+        regular = np.ones(size, dtype=bool)
+        columns = {}
+        for index in indices:
+            values = [state.get(index) for state in states]
+            if set(map(type, values)) != {int}:
+                ints = np.fromiter(map(_is_int, values), dtype=bool, count=size)
+                regular &= ints
+                values = [
+                    value if is_int else 0
+                    for value, is_int in zip(values, ints.tolist())
+                ]
+            try:
+                column = np.array(values, dtype=np.int64)
+            except OverflowError:
+                return None
+            regular &= (column > -MAX_EXACT_INT) & (column < MAX_EXACT_INT)
+            columns[index] = column
+        return columns, regular
+
+    def decode_columns(states: list[dict]) -> list[dict]:
+        size = len(states)
+        if not size:
+            return []
+        read = read_columns(states, size)
+        if read is None:
+            return [decode(state) for state in states]
+        columns, regular = read
+
+        values = []
+        for spec in specs:
+            field_values, found = spec.evaluate(columns, size)
+            if found is not None:
+                regular &= found
+            values.append(field_values)
+
+        decoded = list(map(dict, map(zip, repeat(fields), zip(*values))))
+        for position in np.flatnonzero(~regular).tolist():
+            decoded[position] = decode(states[position])
+        return decoded
+
+    return decode_columns
@@ -0,0 +1,291 @@
+"""Declarative datapoint specs and their compiler.
+
+A physical model describes every Home Assistant field it reports as a spec
+of the xlink datapoints it derives from. compile_decoder turns the specs of
+a model into a single decode function, built once at import from closures
+over lookup tables prebuilt from the specs.
+
+Static capabilities (limits, mode lists) are not decoded per device,
+compile_capabilities builds them once into shared read-only descriptors.
+"""
+
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+# Marks an absent datapoint, or a field without default.
+MISSING = object()
+
+
+# Decodes one field of a raw state into properties.
+FieldDecoder = Callable[[dict, dict], None]
+
+
+@dataclass(frozen=True)
+class Constant:
+    """Field with a fixed value, reported whatever the state."""
+
+    value: Any
+
+    def decoder(self, field: str) -> FieldDecoder:
+        value = self.value
+
+        def decode(state, properties):
+            properties[field] = value
+
+        return decode
+
+
+@dataclass(frozen=True)
+class Scaled:
+    """Datapoint value divided by 'scale', reported when present."""
+
+    index: str
+    scale: int | float = 1
+
+    def decoder(self, field: str) -> FieldDecoder:
+        index, scale = self.index, self.scale
+        if scale == 1:
+
+            def decode(state, properties):
+                value = state.get(index, MISSING)
+                if value is not MISSING:
+                    properties[field] = value
+
+        else:
+
+            def decode(state, properties):
+                value = state.get(index, MISSING)
+                if value is not MISSING:
+                    properties[field] = value / scale
+
+        return decode
+
+
+@dataclass(frozen=True)
+class Mapped:
+    """Datapoint value looked up in 'values'.
+
+    Unknown values report 'default', or nothing when there is no default.
+    """
+
+    index: str
+    values: dict
+    default: Any = MISSING
+
+    def decoder(self, field: str) -> FieldDecoder:
+        index, table, default = self.index, dict(self.values), self.default
+
+        def decode(state, properties):
+            value = state.get(index, MISSING)
+            if value is not MISSING:
+                value = table.get(value, default)
+                if value is not MISSING:
+                    properties[field] = value
+
+        return decode
+
+
+@dataclass(frozen=True)
+class Dependent:
+    """Field whose lookup table is chosen by the value of another datapoint.
+
+    'choices' pairs selector values with a table {datapoint value: field
+    value}, 'default' is the table of unknown or absent selector values.
+    With an 'index' the field is that datapoint looked up in the chosen table,
+    reported when both datapoints are present and the value is known. Without
+    one the field is the list of values of the chosen table, always reported.
+    """
+
+    selector: str
+    choices: tuple[tuple[Iterable, dict], ...]
+    default: dict
+    index: str | None = None
+
+    def _tables(self, convert: Callable[[dict], Any]) -> tuple[dict, Any]:
+        tables = {}
+        for selector_values, table in self.choices:
+            converted = convert(table)
+            for selector_value in selector_values:
+                tables.setdefault(selector_value, converted)
+        return tables, convert(self.default)
+
+    def decoder(self, field: str) -> FieldDecoder:
+        selector, index = self.selector, self.index
+        if index is None:
+            tables, default = self._tables(lambda table: list(table.values()))
+
+            def decode(state, properties):
+                properties[field] = tables.get(state.get(selector, MISSING), default)
+
+            return decode
+
+        # Values are matched by their str, int 1 and "1" select the same entry.
+        tables, default = self._tables(
+            lambda table: {str(raw): value for raw, value in table.items()}
+        )
+
+        def decode(state, properties):
+            choice = state.get(selector, MISSING)
+            value = state.get(index, MISSING)
+            if choice is not MISSING and value is not MISSING:
+                if isinstance(value, int):
+                    value = str(value)
+                value = tables.get(choice, default).get(value, MISSING)
+                if value is not MISSING:
+                    properties[field] = value
+
+        return decode
+
+
+@dataclass(frozen=True)
+class Eq:
+    """Condition, datapoint equals 'value'."""
+
+    index: str
+    value: Any
+
+    def predicate(self) -> Callable[[dict], bool]:
+        index, expected = self.index, self.value
+        return lambda state: state.get(index, MISSING) == expected
+
+
+@dataclass(frozen=True)
+class AnyBits:
+    """Condition, any bit of 'mask' is set in the datapoint."""
+
+    index: str
+    mask: int
+
+    def predicate(self) -> Callable[[dict], bool]:
+        index, mask = self.index, self.mask
+
+        def holds(state):
+            value = state.get(index, MISSING)
+            return value is not MISSING and (value & mask) > 0
+
+        return holds
+
+
+@dataclass(frozen=True)
+class When:
+    """Rule, 'value' when all 'conditions' hold."""
+
+    value: Any
+    conditions: tuple[Eq | AnyBits, ...]
+
+
+@dataclass(frozen=True)
+class Rules:
+    """Value of the first matching rule.
+
+    Nothing is reported when a 'requires' datapoint is absent or no rule
+    matches.
+    """
+
+    rules: tuple[When, ...]
+    requires: tuple[str, ...] = ()
+
+    def decoder(self, field: str) -> FieldDecoder:
+        requires = self.requires
+        rules = tuple(
+            (
+                rule.value,
+                tuple(condition.predicate() for condition in rule.conditions),
+            )
+            for rule in self.rules
+        )
+
+        def decode(state, properties):
+            for index in requires:
+                if index not in state:
+                    return
+            for value, predicates in rules:
+                for holds in predicates:
+                    if not holds(state):
+                        break
+                else:
+                    properties[field] = value
+                    return
+
+        return decode
+
+
+def compile_decoder(
+    datapoints: dict[str, Any], name: str = "decode"
+) -> Callable[[dict], dict]:
+    """Compile the datapoint specs of a model into one decode function.
+
+    :param datapoints: {field: spec} in report order.
+    :return: function decoding a raw state {"index": value} into {field: value}.
+    :rtype: Callable
+    """
+    decoders = tuple(spec.decoder(field) for field, spec in datapoints.items())
+
+    def decode(state: dict) -> dict:
+        properties = {}
+        for decode_field in decoders:
+            decode_field(state, properties)
+        return properties
+
+    decode.__name__ = decode.__qualname__ = name
+    return decode
+
+
+def _freeze(value: Any) -> Any:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def compile_capabilities(
+    capabilities: dict[str, Any],
+) -> Callable[[dict], Mapping[str, Any]]:
+    """Compile the static capabilities of a model into shared descriptors.
+
+    Descriptors are read-only mappings, list values become tuples. A
+    Dependent value without index (e.g. fan modes by machine type) yields one
+    descriptor per table, chosen by the state of its selector datapoint.
+
+    :param capabilities: {field: value or Dependent}, one selector at most.
+    :return: function returning the descriptor of a raw state.
+    :rtype: Callable
+    """
+    dependent = [
+        (field, value)
+        for field, value in capabilities.items()
+        if isinstance(value, Dependent)
+    ]
+    if len(dependent) > 1 or any(value.index is not None for _, value in dependent):
+        raise ValueError("Capabilities depend on one table choice at most")
+
+    def descriptor(table: dict | None = None) -> Mapping[str, Any]:
+        return MappingProxyType(
+            {
+                field: tuple(table.values())
+                if isinstance(value, Dependent)
+                else _freeze(value)
+                for field, value in capabilities.items()
+            }
+        )
+
+    if not dependent:
+        static = descriptor()
+
+        def capabilities_of(state: dict) -> Mapping[str, Any]:
+            return static
+
+        return capabilities_of
+
+    spec = dependent[0][1]
+    default = descriptor(spec.default)
+    by_selector = {}
+    for selector_values, table in spec.choices:
+        variant = descriptor(table)
+        for selector_value in selector_values:
+            by_selector.setdefault(selector_value, variant)
+    selector = spec.selector
+
+    def capabilities_of(state: dict) -> Mapping[str, Any]:
+        return by_selector.get(state.get(selector), default)
+
+    return capabilities_of
@@ -0,0 +1,119 @@
+"""Adaptive poll interval of the coordinator.
+
+Right after a control command or a changed setting the home is polled
+quickly. Otherwise the interval returns to the configured scan interval and
+grows from there while polls find nothing new, it is stretched further at
+night and while no device is heating or cooling.
+"""
+
+from typing import Any
+
+from .const import DEFAULT_SCAN_INTERVAL
+
+
+class AdaptivePollPolicy:
+    """Chooses the seconds until the next poll."""
+
+    # seconds between polls after activity
+    fast_interval = 10
+
+    # seconds of fast polling after a control command or a changed setting
+    fast_period = 120
+
+    # upper bound of the steady interval before the night and idle factors,
+    # in seconds
+    max_interval = 300
+
+    # growth of the interval per poll that changed nothing
+    decay = 1.5
+
+    # local hours [start, end) of the night, the window may wrap midnight
+    night_start = 23
+    night_end = 6
+
+    # interval multiplier at night
+    night_factor = 2.0
+
+    # interval multiplier while every device is idle or off
+    idle_factor = 2.0
+
+    def __init__(self, base_interval: float = DEFAULT_SCAN_INTERVAL) -> None:
+        """Initiate AdaptivePollPolicy class.
+
+        :param base_interval: seconds between polls of a steady home.
+        """
+        self.base_interval = base_interval
+        self.max_interval = max(self.max_interval, base_interval)
+        # steady interval, grows by 'decay' while polls change nothing
+        self._steady = float(base_interval)
+        # monotonic time fast polling ends
+        self._fast_until = 0.0
+
+    def note_activity(self, now: float):
+        """Poll quickly for 'fast_period' seconds from 'now'."""
+        self._fast_until = max(self._fast_until, now + self.fast_period)
+
+    def is_fast(self, now: float) -> bool:
+        """Whether polls are currently fast."""
+        return now < self._fast_until
+
+    def is_night(self, hour: int) -> bool:
+        """Whether the local 'hour' is in the night window."""
+        if self.night_start <= self.night_end:
+            return self.night_start <= hour < self.night_end
+        return hour >= self.night_start or hour < self.night_end
+
+    def next_interval(
+        self, now: float, hour: int, changed: bool, all_idle: bool
+    ) -> float:
+        """Seconds until the next poll.
+
+        :param now: monotonic time.
+        :param hour: local hour of the day.
+        :param changed: the last poll found changed devices.
+        :param all_idle: no device is heating or cooling.
+        :return: interval in seconds.
+        :rtype: float
+        """
+        if changed:
+            self._steady = float(self.base_interval)
+        else:
+            self._steady = min(self._steady * self.decay, self.max_interval)
+        if self.is_fast(now):
+            return float(min(self.fast_interval, self.base_interval))
+        interval = self._steady
+        if self.is_night(hour):
+            interval *= self.night_factor
+        if all_idle:
+            interval *= self.idle_factor
+        return interval
+
+    def retry_interval(self, now: float) -> float:
+        """Seconds until the poll retrying a failed one.
+
+        A failed poll tells nothing about the home, the decay restarts from
+        the base interval and the night and idle factors are not applied, so
+        polling recovers quickly once the cloud is back.
+
+        :param now: monotonic time.
+        :return: interval in seconds.
+        :rtype: float
+        """
+        self._steady = float(self.base_interval)
+        if self.is_fast(now):
+            return float(min(self.fast_interval, self.base_interval))
+        return self._steady
+
+    def as_dict(self) -> dict[str, Any]:
+        """Parameters and state, for diagnostics."""
+        return {
+            "base_interval": self.base_interval,
+            "fast_interval": self.fast_interval,
+            "fast_period": self.fast_period,
+            "max_interval": self.max_interval,
+            "decay": self.decay,
+            "night": [self.night_start, self.night_end],
+            "night_factor": self.night_factor,
+            "idle_factor": self.idle_factor,
+            "steady_interval": self._steady,
+        }
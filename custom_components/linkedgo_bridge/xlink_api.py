@@ -5,14 +5,24 @@
 # FilePath: \xlink_data_import\xlink_api.py
 # Description: 云智易接口请求API封装类
 
+import asyncio
 import logging
 import aiohttp
-import urllib
-import json
 import datetime
-import threading
+import time
 from enum import StrEnum
 
+from .xlink_auth import XlinkAuthManager
+from .xlink_cache import XlinkMetadataCache
+from .xlink_codec import DEFAULT_CODEC
+from .xlink_metrics import XlinkMetrics
+from .xlink_retry import (
+    READ_RETRY_POLICY,
+    WRITE_RETRY_POLICY,
+    CircuitBreaker,
+)
+from .xlink_scheduler import XlinkRequestScheduler, parse_retry_after
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -44,14 +54,23 @@ class XlinkFields(StrEnum):
     CODE = "code"
 
 
+class XlinkEndpoint(StrEnum):
+    """Xlink rest endpoints, used as scheduling and metric labels."""
+
+    USER_AUTH = "v2/user_auth"
+    TOKEN_REFRESH = "v2/user/token/refresh"
+    HOMES = "v2/homes"
+    HOME_DEVICES = "v2/home/{id}/devices"
+    V_DEVICES = "v2/product/{pid}/v_devices"
+    DEVICE_SET = "v2/diagnosis/device/set"
+
+
 class XlinkAPI(object):
     """Xlink http request api."""
 
     REQUEST_METHOD_GET = "GET"
     REQUEST_METHOD_POST = "POST"
 
-    _instance_lock = threading.Lock()
-
     # RestUri preffix
     base_url = "https://api2.xlink.cn"
 
@@ -61,163 +80,360 @@ class XlinkAPI(object):
     # refresh token in advance seconds
     refresh_token_timeout = 600
 
-    # aceess token
-    access_token = None
+    # max pooled connections kept to base_url
+    connection_limit = 10
 
-    # refresh token
-    refresh_token = None
+    # seconds to cache the DNS lookup of base_url
+    dns_cache_ttl = 300
 
-    # user identifer
-    user_id = None
+    # seconds to keep an idle connection open
+    keepalive_timeout = 60
 
-    # expire time
-    expire_time = None
+    # total timeout seconds of a single request
+    request_timeout = 15
 
-    # authorize code
-    authorize_code = None
+    # max requests in flight
+    max_concurrent_requests = 8
 
-    def __init__(self):
-        """Initiate XlinkAPI class."""
+    # of max_concurrent_requests, slots background requests leave free for
+    # interactive ones (control commands and their confirmation)
+    interactive_reserved_requests = 1
 
-    # single instance
-    def __new__(cls, *args, **kwargs):
-        if not hasattr(XlinkAPI, "_instance"):
-            with XlinkAPI._instance_lock:
-                if not hasattr(XlinkAPI, "_instance"):
-                    XlinkAPI._instance = object.__new__(cls)
-        return XlinkAPI._instance
+    # token bucket per endpoint: (requests per second, burst)
+    endpoint_rate_limits = {
+        XlinkEndpoint.V_DEVICES: (5.0, 10),
+        XlinkEndpoint.DEVICE_SET: (5.0, 10),
+        XlinkEndpoint.TOKEN_REFRESH: (0.1, 2),
+    }
 
-    def send_request_sync(self, rest_url: str, headers, request_body, method):
-        """Send https request in synchronize method.
+    # seconds to back off after a 429 without Retry-After header
+    default_retry_after = 5
 
-        :param rest_url: request url.
-        :param headers: request headers.
-        :param request_body: request body.
-        :param method:  request method.
-        :return: (HttpStatusCode/None, None/BodyString/BodyJson)
-        :rtype: Set
+    # json codec of request and response bodies
+    codec = DEFAULT_CODEC
+
+    # retry policy per endpoint, endpoints not listed are retried as reads
+    endpoint_retry_policies = {
+        XlinkEndpoint.DEVICE_SET: WRITE_RETRY_POLICY,
+        XlinkEndpoint.TOKEN_REFRESH: WRITE_RETRY_POLICY,
+    }
+
+    # consecutive failures opening the circuit breaker
+    circuit_failure_threshold = 5
+
+    # seconds before an open circuit lets a probe request through
+    circuit_recovery_timeout = 30
+
+    # endpoints sent without a valid access token
+    auth_endpoints = (XlinkEndpoint.USER_AUTH, XlinkEndpoint.TOKEN_REFRESH)
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        metadata_cache: XlinkMetadataCache | None = None,
+    ):
+        """Initiate XlinkAPI class.
+
+        Every instance is one account with its own tokens, connection pool,
+        scheduler and circuit breaker.
+
+        :param session: externally owned session to use instead of a pool of
+            this client, e.g. the shared Home Assistant session. It is not
+            closed by async_close.
+        :param metadata_cache: cache of homes and home devices, pass one that
+            outlives the client to keep it across reloads.
         """
-        if request_body:
-            request = urllib.request.Request(
-                url=rest_url,
-                headers=headers,
-                data=json.dumps(request_body).encode("utf-8"),
-                method=method,
+        # aceess token
+        self.access_token = None
+
+        # refresh token
+        self.refresh_token = None
+
+        # user identifer
+        self.user_id = None
+
+        # expire time
+        self.expire_time = None
+
+        # expire time on the monotonic clock, drives token refresh
+        self.expire_monotonic = None
+
+        # authorize code
+        self.authorize_code = None
+
+        # pooled http session
+        self._session = session
+        self._owns_session = session is None
+
+        # request admission control
+        self._scheduler = XlinkRequestScheduler(
+            self.max_concurrent_requests,
+            self.endpoint_rate_limits,
+            self.interactive_reserved_requests,
+        )
+
+        # fail fast while the cloud is down
+        self.circuit_breaker = CircuitBreaker(
+            self.circuit_failure_threshold, self.circuit_recovery_timeout
+        )
+
+        # token refresh and relogin
+        self.auth = XlinkAuthManager(self)
+
+        # per endpoint request metrics
+        self.metrics = XlinkMetrics()
+
+        # homes and home devices
+        self.metadata_cache = (
+            metadata_cache if metadata_cache is not None else XlinkMetadataCache()
+        )
+
+    async def _async_get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled keep-alive session, creating it on first use.
+
+        :return: shared client session of this client.
+        :rtype: aiohttp.ClientSession
+        """
+        if self._owns_session and (self._session is None or self._session.closed):
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
             )
-        else:
-            request = urllib.request.Request(
-                url=rest_url, headers=headers, method=method
+            headers = {"Content-Type": "application/json"}
+            if self.access_token:
+                headers["Access-Token"] = self.access_token
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
             )
+        return self._session
 
-        try:
-            response = urllib.request.urlopen(request)
-        except Exception as e:
-            error_info = str(e)
-            _LOGGER.error(error_info)
-            return None, None
-        else:
-            if response:
-                code = response.getcode()
-                str_result = response.read().decode("utf-8")
-                if code == 200:
-                    rsp_json = json.loads(str_result)
-                    return code, rsp_json
-                _LOGGER.error(
-                    f"Req url: {rest_url}\nRsp code: {code}\nRsp body: {str_result}"
-                )
-                return code, str_result
-            return None, None
+    def _request_headers(self, headers):
+        """Headers to send along, an external session has no default headers.
 
-    async def send_request_async(self, rest_url, headers, request_body, method):
-        """Send HTTPS request using aiohttp in asynchronous method.
+        :param headers: request specific headers or None.
+        :return: headers of the request.
+        :rtype: dict
+        """
+        if self._owns_session:
+            return headers
+        merged = {"Content-Type": "application/json"}
+        if self.access_token:
+            merged["Access-Token"] = self.access_token
+        if headers:
+            merged.update(headers)
+        return merged
+
+    @property
+    def online(self) -> bool:
+        """False while the circuit breaker considers the cloud down."""
+        return self.circuit_breaker.closed
+
+    def widen_rate_limit(self, endpoint, rate: float, capacity: int):
+        """Raise the token bucket of 'endpoint' to fit a larger workload.
+
+        :param endpoint: endpoint label of endpoint_rate_limits.
+        :param rate: min requests per second.
+        :param capacity: min burst size.
+        """
+        self._scheduler.widen(endpoint, rate, capacity)
+
+    def scheduler_stats(self) -> dict:
+        """Queue depth, requests in flight and wait time per priority."""
+        return self._scheduler.as_dict()
+
+    async def async_close(self):
+        """Close the pooled session and release its connections."""
+        self.auth.stop()
+        if not self._owns_session:
+            return
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _update_authorization(self, rsp_json):
+        """Store tokens from an auth response and refresh the default headers.
+
+        :param rsp_json: respond body of user_auth or token refresh.
+        """
+        self.access_token = rsp_json[XlinkFields.ACCESS_TOKEN]
+        self.refresh_token = rsp_json[XlinkFields.REFRESH_TOKEN]
+        expire_timeout = rsp_json[XlinkFields.EXPIRE_IN]
+        self.expire_time = datetime.datetime.now() + datetime.timedelta(
+            seconds=expire_timeout
+        )
+        self.expire_monotonic = time.monotonic() + expire_timeout
+        if self._owns_session and self._session is not None:
+            self._session.headers["Access-Token"] = self.access_token
+
+    async def send_request_async(
+        self,
+        rest_url,
+        headers,
+        request_body,
+        method,
+        endpoint=None,
+        response_headers=None,
+    ):
+        """Send HTTPS request over the pooled session.
+
+        Access-Token and Content-Type are carried by the session default headers,
+        ``headers`` only needs to hold request specific additions. Requests wait
+        for the scheduler before they are sent, a 429 pauses the whole client.
+        Failures are retried according to the endpoint retry policy, while the
+        circuit breaker is open requests fail fast without being sent. A 403 on
+        an authenticated endpoint refreshes the token once and repeats the request.
 
         :param rest_url: Request URL.
-        :param headers: Request headers.
+        :param headers: Extra request headers or None.
         :param request_body: Request body (dict).
         :param method: Request method: 'GET', 'POST', 'PUT', etc.
-        :return: (HTTP Status Code or None, None or str or dict)
+        :param endpoint: XlinkEndpoint label used for rate limiting and retries.
+        :param response_headers: dict receiving the cache validators (ETag,
+            Last-Modified) of the response, if given.
+        :return: (HTTP Status Code or None, None or str or dict), error responses
+            keep their status code and body.
         :rtype: Tuple[int | None, Any]
         """
-        try:
-            async with aiohttp.ClientSession() as session:
-                request_func = getattr(session, method.lower(), None)
-                if not request_func:
-                    _LOGGER.error(f"Unsupported HTTP method: {method}")
-                    return None, None
-
-                # For GET, do not pass json=request_body
-                if method.upper() == self.REQUEST_METHOD_GET:
-                    async with request_func(rest_url, headers=headers) as response:
-                        status = response.status
-                        text = await response.text()
-                        if status == 200:
-                            try:
-                                return status, await response.json()
-                            except Exception:
-                                _LOGGER.error(
-                                    f"Req url: {rest_url}\nRsp code: {status}\nRsp body: {text}"
-                                )
-                                return None, None
-                        _LOGGER.error(
-                            f"Req url: {rest_url}\nRsp code: {status}\nRsp body: {text}"
-                        )
-                        return None, None
-                else:
-                    async with request_func(
-                        rest_url,
-                        headers=headers,
-                        json=request_body if request_body else None,
-                    ) as response:
-                        status = response.status
-                        text = await response.text()
-                        if status == 200:
-                            try:
-                                return status, await response.json()
-                            except Exception:
-                                _LOGGER.error(f"Req url: {rest_url}\nRsp body: {text}")
-                                return None, None
-                        _LOGGER.error(
-                            f"Req url: {rest_url}\nRsp code: {status}\nRsp body: {text}"
-                        )
-                        return None, None
-        except Exception as e:
-            _LOGGER.error(f"HTTP request failed: {e}")
-            return None, None
-
-    def user_login(self, usename, password):
-        """User login.
+        breaker = self.circuit_breaker
+        policy = self.endpoint_retry_policies.get(endpoint, READ_RETRY_POLICY)
+        method = method.upper()
+        # For GET, do not send a body
+        data = None
+        if method != self.REQUEST_METHOD_GET and request_body:
+            data = self.codec.dumps(request_body)
+        attempt = 0
+        reauthorized = endpoint in self.auth_endpoints
+        while True:
+            if not breaker.allow_request():
+                _LOGGER.debug(f"Circuit open, skip request: {rest_url}")
+                return None, None
+            token = self.access_token
+            try:
+                status, rsp_body = await self._async_send_once(
+                    rest_url, headers, data, method, endpoint, response_headers
+                )
+            except Exception as e:
+                self.metrics.record_error(endpoint, e)
+                breaker.record_failure()
+                if policy.should_retry_error(e, attempt):
+                    await asyncio.sleep(policy.delay(attempt))
+                    attempt += 1
+                    continue
+                _LOGGER.error(f"HTTP request failed: {e}")
+                return None, None
+
+            if status is not None and status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if status in (200, 304):
+                return status, rsp_body
+            if status == 403 and not reauthorized:
+                reauthorized = True
+                _LOGGER.info(f"Access token rejected, refreshing: {rsp_body}")
+                if await self.auth.async_refresh(stale_token=token):
+                    continue
+            if policy.should_retry_status(status, attempt):
+                await asyncio.sleep(policy.delay(attempt))
+                attempt += 1
+                continue
+            _LOGGER.error(
+                f"Req url: {rest_url}\nRsp code: {status}\nRsp body: {rsp_body}"
+            )
+            if status is None:
+                return None, None
+            return status, rsp_body
 
-        :param use_name: user name or account, email or phone number.
-        :param password: password.
-        :return: (respond code, respond body, in format of json).
-        :rtype: Set
+    async def _async_send_once(
+        self, rest_url, headers, data, method, endpoint, response_headers=None
+    ):
+        """Send a single request attempt.
+
+        The body is decoded once from bytes, the text is only materialized when
+        the body is not valid json.
+
+        :param data: serialized request body or None.
+        :return: (HTTP Status Code, str or dict); (None, body text) when a 200
+            body can not be decoded.
+        :rtype: Tuple[int | None, Any]
+        :raises aiohttp.ClientError, asyncio.TimeoutError: transport failures.
         """
-        suffix = "/v2/user_auth"
-        rest_url = self.base_url + suffix
+        session = await self._async_get_session()
+        scheduler = self._scheduler
+        queued_at = time.monotonic()
+        async with scheduler.async_slot(endpoint):
+            sent_at = time.monotonic()
+            async with session.request(
+                method, rest_url, headers=self._request_headers(headers), data=data
+            ) as response:
+                status = response.status
+                raw = await response.read()
+                if response_headers is not None:
+                    for name in ("ETag", "Last-Modified"):
+                        if name in response.headers:
+                            response_headers[name] = response.headers[name]
+                if status == 429:
+                    retry_after = parse_retry_after(
+                        response.headers.get("Retry-After")
+                    )
+                    scheduler.defer(
+                        self.default_retry_after if retry_after is None else retry_after
+                    )
+        received_at = time.monotonic()
+        if not raw.strip():
+            # Writes may answer without a body, like aiohttp json() it is None.
+            result = status, None
+        else:
+            try:
+                result = status, self.codec.loads(raw)
+            except ValueError:
+                text = raw.decode("utf-8", errors="replace")
+                # Keep the error body, callers react on codes such as 403.
+                result = (None if status == 200 else status), text
+        self.metrics.record_response(
+            endpoint,
+            status,
+            len(raw),
+            wait=sent_at - queued_at,
+            latency=received_at - sent_at,
+            decode=time.monotonic() - received_at,
+        )
+        return result
 
-        headers = {"Content-Type": "application/json"}
+    async def _async_cached_get(self, rest_url, endpoint):
+        """GET a metadata url through the metadata cache.
 
-        request_body = {
-            "corp_id": self.corp_id,
-            "phone": usename,
-            "password": password,
-            "resource": "web",
-        }
+        :param rest_url: request url, also the cache key.
+        :param endpoint: XlinkEndpoint label.
+        :return: (respond code, respond body, in format of json).
+        :rtype: Set
+        """
+        cache = self.metadata_cache
+        entry = cache.get(rest_url)
+        if entry is not None and cache.is_fresh(entry):
+            cache.hits += 1
+            return 200, entry.body
 
-        code, rsp_json = self.send_request_sync(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+        rsp_headers = {}
+        code, rsp_json = await self.send_request_async(
+            rest_url,
+            entry.validators() if entry is not None else None,
+            None,
+            self.REQUEST_METHOD_GET,
+            endpoint=endpoint,
+            response_headers=rsp_headers,
         )
-
-        if code and code == 200:
-            if XlinkFields.ACCESS_TOKEN in rsp_json:
-                self.access_token = rsp_json[XlinkFields.ACCESS_TOKEN]
-                self.refresh_token = rsp_json[XlinkFields.REFRESH_TOKEN]
-                self.user_id = rsp_json[XlinkFields.USER_ID]
-                self.authorize_code = rsp_json[XlinkFields.AUTHORIZE]
-                expire_timeout = rsp_json[XlinkFields.EXPIRE_IN]
-                self.expire_time = datetime.datetime.now() + datetime.timedelta(
-                    seconds=expire_timeout
-                )
+        if code == 304 and entry is not None:
+            cache.revalidations += 1
+            cache.touch(entry)
+            return 200, entry.body
+        if code == 200:
+            cache.misses += 1
+            cache.store(rest_url, rsp_json, rsp_headers)
         return code, rsp_json
 
     async def async_user_login(self, use_name, password):
@@ -231,8 +447,6 @@ class XlinkAPI(object):
         suffix = "/v2/user_auth"
         rest_url = self.base_url + suffix
 
-        headers = {"Content-Type": "application/json"}
-
         request_body = {
             "corp_id": self.corp_id,
             "phone": use_name,
@@ -241,19 +455,18 @@ class XlinkAPI(object):
         }
 
         code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+            rest_url,
+            None,
+            request_body,
+            self.REQUEST_METHOD_POST,
+            endpoint=XlinkEndpoint.USER_AUTH,
         )
 
         if code and code == 200:
             if XlinkFields.ACCESS_TOKEN in rsp_json:
-                self.access_token = rsp_json[XlinkFields.ACCESS_TOKEN]
-                self.refresh_token = rsp_json[XlinkFields.REFRESH_TOKEN]
                 self.user_id = rsp_json[XlinkFields.USER_ID]
                 self.authorize_code = rsp_json[XlinkFields.AUTHORIZE]
-                expire_timeout = rsp_json[XlinkFields.EXPIRE_IN]
-                self.expire_time = datetime.datetime.now() + datetime.timedelta(
-                    seconds=expire_timeout
-                )
+                self._update_authorization(rsp_json)
 
         return code, rsp_json
 
@@ -268,25 +481,19 @@ class XlinkAPI(object):
         suffix = "/v2/user/token/refresh"
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
         request_body = {"refresh_token": self.refresh_token}
 
         code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+            rest_url,
+            None,
+            request_body,
+            self.REQUEST_METHOD_POST,
+            endpoint=XlinkEndpoint.TOKEN_REFRESH,
         )
 
         if code and code == 200:
             if XlinkFields.ACCESS_TOKEN in rsp_json:
-                self.access_token = rsp_json[XlinkFields.ACCESS_TOKEN]
-                self.refresh_token = rsp_json[XlinkFields.REFRESH_TOKEN]
-                expire_timeout = rsp_json[XlinkFields.EXPIRE_IN]
-                self.expire_time = datetime.datetime.now() + datetime.timedelta(
-                    seconds=expire_timeout
-                )
+                self._update_authorization(rsp_json)
 
         return code, rsp_json
 
@@ -302,18 +509,7 @@ class XlinkAPI(object):
         )
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
-        request_body = None
-
-        code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_GET
-        )
-
-        return code, rsp_json
+        return await self._async_cached_get(rest_url, XlinkEndpoint.HOMES)
 
     # list of devices belong to certain home
     # home_id: home identifer
@@ -332,18 +528,7 @@ class XlinkAPI(object):
         suffix = f"/v2/home/{home_id}/devices".format(home_id=home_id)
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
-        request_body = None
-
-        code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_GET
-        )
-
-        return code, rsp_json
+        return await self._async_cached_get(rest_url, XlinkEndpoint.HOME_DEVICES)
 
     async def async_batch_query_vdevice(self, product_id, device_list):
         """Query vitual device state in batches.
@@ -357,15 +542,14 @@ class XlinkAPI(object):
         suffix = f"/v2/product/{product_id}/v_devices".format(product_id=product_id)
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
         request_body = device_list
 
         code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+            rest_url,
+            None,
+            request_body,
+            self.REQUEST_METHOD_POST,
+            endpoint=XlinkEndpoint.V_DEVICES,
         )
         return code, rsp_json
 
@@ -381,15 +565,14 @@ class XlinkAPI(object):
         suffix = f"/v2/diagnosis/device/set/{device_id}".format(device_id=device_id)
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
         request_body = {"datapoint": [{"index": index, "value": value}]}
 
         code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+            rest_url,
+            None,
+            request_body,
+            self.REQUEST_METHOD_POST,
+            endpoint=XlinkEndpoint.DEVICE_SET,
         )
         return code, rsp_json
 
@@ -404,15 +587,14 @@ class XlinkAPI(object):
         suffix = f"/v2/diagnosis/device/set/{device_id}".format(device_id=device_id)
         rest_url = self.base_url + suffix
 
-        headers = {
-            "Access-Token": self.access_token,
-            "Content-Type": "application/json",
-        }
-
         request_body = {"datapoint": dps}
 
         code, rsp_json = await self.send_request_async(
-            rest_url, headers, request_body, self.REQUEST_METHOD_POST
+            rest_url,
+            None,
+            request_body,
+            self.REQUEST_METHOD_POST,
+            endpoint=XlinkEndpoint.DEVICE_SET,
         )
         return code, rsp_json
 
@@ -423,10 +605,4 @@ class XlinkAPI(object):
         :return: Ture-valid, False-invalid.
         :rtype: bool
         """
-        if self.access_token:
-            current_time = datetime.datetime.now()
-            if self.expire_time > (
-                current_time + datetime.timedelta(seconds=timedelta)
-            ):
-                return True
-        return False
+        return self.auth.token_valid(timedelta)
@@ -0,0 +1,124 @@
+"""Token lifecycle of an Xlink client.
+
+Refreshes the access token shortly before it expires and collapses
+concurrent refresh/relogin attempts into a single in-flight request.
+"""
+
+import asyncio
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class XlinkAuthManager:
+    """Single-flight token refresh and relogin for one XlinkAPI client."""
+
+    def __init__(self, api) -> None:
+        """Initiate XlinkAuthManager class.
+
+        :param api: XlinkAPI client whose tokens are managed.
+        """
+        self.api = api
+        self.username = None
+        self.password = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    def set_credentials(self, username, password):
+        """Remember credentials used for relogin when the refresh token is gone."""
+        if username:
+            self.username = username
+        if password:
+            self.password = password
+
+    def token_valid(self, margin: float = 0) -> bool:
+        """Whether the access token is still valid 'margin' seconds from now.
+
+        :param margin: seconds.
+        :return: True - valid, False - expired or missing.
+        :rtype: bool
+        """
+        if not self.api.access_token or self.api.expire_monotonic is None:
+            return False
+        return self.api.expire_monotonic > time.monotonic() + margin
+
+    async def async_login(self, username=None, password=None):
+        """Log in, joining a login or refresh already in flight.
+
+        :return: (respond code, respond body) of the login.
+        :rtype: Set
+        """
+        self.set_credentials(username, password)
+        return await self._async_single_flight(self._async_do_login)
+
+    async def async_refresh(self, stale_token=None) -> bool:
+        """Refresh the access token, falling back to a relogin.
+
+        :param stale_token: token a failed request was sent with. When the
+            current token differs, another caller already refreshed it.
+        :return: True - a valid token is available, False - refresh failed.
+        :rtype: bool
+        """
+        if stale_token is not None and self.api.access_token != stale_token:
+            return True
+        code, _ = await self._async_single_flight(self._async_do_refresh)
+        return code == 200
+
+    async def _async_single_flight(self, factory):
+        async with self._lock:
+            if self._task is None or self._task.done():
+                self._task = asyncio.get_running_loop().create_task(factory())
+            task = self._task
+        return await asyncio.shield(task)
+
+    async def _async_do_login(self):
+        code, rsp_json = await self.api.async_user_login(self.username, self.password)
+        if code == 200:
+            self._schedule_refresh()
+        return code, rsp_json
+
+    async def _async_do_refresh(self):
+        if self.api.refresh_token:
+            code, rsp_json = await self.api.async_refresh_token()
+            if code == 200:
+                _LOGGER.info("Refresh token successfully")
+                self._schedule_refresh()
+                return code, rsp_json
+            _LOGGER.warning(f"Refresh token failed, error message: {rsp_json}")
+        if not self.username or not self.password:
+            return None, None
+        return await self._async_do_login()
+
+    def _schedule_refresh(self):
+        """Schedule the next refresh 'refresh_token_timeout' before expiry."""
+        if self._timer is not None:
+            self._timer.cancel()
+        refresh_at = self.api.expire_monotonic - self.api.refresh_token_timeout
+        delay = refresh_at - time.monotonic()
+        self._timer = asyncio.get_running_loop().call_later(
+            max(delay, 0), self._on_refresh_due
+        )
+
+    def _on_refresh_due(self):
+        self._timer = None
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self.async_refresh()
+        )
+
+    def stop(self):
+        """Cancel the scheduled refresh and the refresh or login in flight.
+
+        A task left running would reschedule the timer after the client is
+        closed.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in (self._refresh_task, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._refresh_task = None
+        self._task = None
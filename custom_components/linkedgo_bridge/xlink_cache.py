@@ -0,0 +1,78 @@
+"""Cache of slowly changing Xlink metadata (homes, home devices).
+
+Entries are served from memory while younger than the TTL. Expired entries
+are revalidated with If-None-Match / If-Modified-Since when the cloud sent
+an ETag or Last-Modified header, a 304 keeps the cached body.
+"""
+
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+
+@dataclass
+class CacheEntry:
+    """Cached response body and its validators."""
+
+    body: Any
+    stored_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def validators(self) -> dict[str, str] | None:
+        """Conditional request headers, None when the cloud sent no validator."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers or None
+
+
+@dataclass
+class XlinkMetadataCache:
+    """Metadata cache of one account, keyed by request url."""
+
+    ttl: float = 600
+    entries: dict[str, CacheEntry] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Return the entry of 'key' whether fresh or not."""
+        return self.entries.get(key)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether 'entry' may be served without asking the cloud."""
+        return time.monotonic() - entry.stored_at < self.ttl
+
+    def store(self, key: str, body: Any, headers: dict | None = None):
+        """Store a downloaded body with the validators of its response."""
+        headers = headers or {}
+        self.entries[key] = CacheEntry(
+            body=body,
+            stored_at=time.monotonic(),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        )
+
+    def touch(self, entry: CacheEntry):
+        """Restart the TTL of an entry confirmed by a 304."""
+        entry.stored_at = time.monotonic()
+
+    def invalidate(self, key: str | None = None):
+        """Drop one entry, or every entry when 'key' is None."""
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def as_dict(self) -> dict:
+        """Counters for diagnostics."""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+        }
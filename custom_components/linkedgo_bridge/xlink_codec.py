@@ -0,0 +1,37 @@
+"""JSON codecs of the Xlink http transport.
+
+Bodies are decoded once straight from bytes. orjson is used when it is
+importable (Home Assistant ships it), the standard library otherwise.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+@dataclass(frozen=True)
+class XlinkCodec:
+    """Serialize request bodies to bytes and parse response bodies from bytes."""
+
+    name: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+JSON_CODEC = XlinkCodec("json", json.loads, _json_dumps)
+
+ORJSON_CODEC = (
+    XlinkCodec("orjson", orjson.loads, orjson.dumps) if orjson is not None else None
+)
+
+DEFAULT_CODEC = ORJSON_CODEC or JSON_CODEC
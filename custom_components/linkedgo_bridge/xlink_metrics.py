@@ -0,0 +1,168 @@
+"""In-memory request metrics of the Xlink http transport.
+
+Per endpoint call counts, status codes, transport errors, bytes received and
+latency histograms, split into time queued in the scheduler, network round
+trip and body decoding.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+
+# upper bounds of the histogram buckets in milliseconds, the last bucket is open
+LATENCY_BUCKETS_MS = (
+    1,
+    2.5,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    30000,
+)
+
+
+class LatencyHistogram:
+    """Fixed bucket latency histogram with interpolated percentiles."""
+
+    def __init__(self) -> None:
+        """Initiate LatencyHistogram class."""
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        """Add a sample.
+
+        :param seconds: measured duration.
+        """
+        ms = seconds * 1000
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, quantile: float) -> float | None:
+        """Estimate a percentile by linear interpolation inside its bucket.
+
+        :param quantile: 0-1.
+        :return: milliseconds, None without samples.
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS_MS[index - 1] if index else 0.0
+                upper = (
+                    LATENCY_BUCKETS_MS[index]
+                    if index < len(LATENCY_BUCKETS_MS)
+                    else self.max_ms
+                )
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return round(min(value, self.max_ms), 3)
+            seen += bucket_count
+        return round(self.max_ms, 3)
+
+    def as_dict(self) -> dict:
+        """Summary for diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class EndpointMetrics:
+    """Counters and histograms of one endpoint."""
+
+    def __init__(self) -> None:
+        """Initiate EndpointMetrics class."""
+        self.calls = 0
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes_received = 0
+        self.wait = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.decode = LatencyHistogram()
+
+    def as_dict(self) -> dict:
+        """Summary for diagnostics."""
+        return {
+            "calls": self.calls,
+            "statuses": {str(code): count for code, count in self.statuses.items()},
+            "errors": dict(self.errors),
+            "bytes_received": self.bytes_received,
+            "wait": self.wait.as_dict(),
+            "latency": self.latency.as_dict(),
+            "decode": self.decode.as_dict(),
+        }
+
+
+class XlinkMetrics:
+    """Request metrics of one Xlink client, keyed by endpoint label."""
+
+    def __init__(self) -> None:
+        """Initiate XlinkMetrics class."""
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, endpoint) -> EndpointMetrics:
+        """Metrics of an endpoint, created on first use.
+
+        :param endpoint: XlinkEndpoint label, None is reported as 'other'.
+        """
+        key = str(endpoint) if endpoint else "other"
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics()
+        return metrics
+
+    def record_response(
+        self, endpoint, status, size, wait: float, latency: float, decode: float
+    ):
+        """Record one completed request attempt.
+
+        :param endpoint: XlinkEndpoint label.
+        :param status: http status code.
+        :param size: bytes of the response body.
+        :param wait: seconds queued in the scheduler.
+        :param latency: seconds from send to the last body byte.
+        :param decode: seconds spent decoding the body.
+        """
+        metrics = self.endpoint(endpoint)
+        metrics.calls += 1
+        metrics.statuses[status] += 1
+        metrics.bytes_received += size
+        metrics.wait.record(wait)
+        metrics.latency.record(latency)
+        metrics.decode.record(decode)
+
+    def record_error(self, endpoint, err: Exception):
+        """Record one request attempt failed in the transport.
+
+        :param endpoint: XlinkEndpoint label.
+        :param err: raised exception.
+        """
+        metrics = self.endpoint(endpoint)
+        metrics.calls += 1
+        metrics.errors[type(err).__name__] += 1
+
+    def as_dict(self) -> dict:
+        """Snapshot of all endpoints."""
+        return {key: metrics.as_dict() for key, metrics in self.endpoints.items()}
+
+    def reset(self):
+        """Drop all samples."""
+        self.endpoints.clear()
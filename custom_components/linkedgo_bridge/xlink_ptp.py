@@ -4,13 +4,18 @@ You should create your api seperately and have it hosted on PYPI.  This is inclu
 of making this example code executable.
 """
 
+import asyncio
 import logging
 from typing import Any
 from enum import StrEnum
 
-from .xlink_api import XlinkAPI, XlinkFields
+import aiohttp
+
+from .xlink_api import XlinkAPI, XlinkEndpoint, XlinkFields
+from .xlink_cache import XlinkMetadataCache
 from .physical_model import XLINK_PHYSICAL_MODEL
 from .const import DeviceEntity
+from .device_table import normalize_device_id
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,34 +25,74 @@ class PTPFields(StrEnum):
     HOME_NAME = "home_name"
 
 
+class _WriteBatch:
+    """Datapoints written to one device in a coalescing window."""
+
+    def __init__(self, previous: asyncio.Task | None) -> None:
+        # {index: datapoint}, a later value of an index replaces the earlier
+        self.datapoints: dict[Any, dict] = {}
+        self.futures: list[asyncio.Future] = []
+        # send of the previous batch of the device, writes keep their order
+        self.previous = previous
+
+    def add(self, dps: list[dict]):
+        for dp in dps:
+            self.datapoints.pop(dp["index"], None)
+            self.datapoints[dp["index"]] = dp
+
+
 class PTP:
     """Class for transformation from Xlink protocol to HomeAssistant protocol."""
 
-    def __init__(self) -> None:
-        """Initiate PTP class."""
-        self.api = XlinkAPI()
-        self.username = None
-        self.password = None
+    # max devices per v_devices request
+    batch_query_size = 200
 
-    def user_auth(self, username, password) -> str:
-        """User login.
+    # max v_devices requests of one poll in flight
+    batch_query_concurrency = 8
 
-        :return: user_id, login success; Exception, login falied.
-        :rtype: str
+    # seconds the v_devices requests of consecutive polls are spread over at
+    # least, the v_devices rate limit is widened so a poll of the whole fleet
+    # is one burst and a poll every 'batch_query_period' keeps up
+    batch_query_period = 10
+
+    # min states of a v_devices response decoded column wise with numpy,
+    # 0 to always decode per device
+    columnar_decode_min_devices = 0
+
+    # seconds control commands of a device are collected into one write
+    write_coalesce_window = 0.1
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        metadata_cache: XlinkMetadataCache | None = None,
+    ) -> None:
+        """Initiate PTP class.
+
+        :param session: externally owned http session, None to let the
+            account client keep its own connection pool.
+        :param metadata_cache: cache of homes and home devices of the account.
         """
+        self.api = XlinkAPI(session, metadata_cache)
+        self.username = None
+        self.password = None
+        # last raw state of every device returned by a poll, compared with
+        # the next one it is an exact and cheaper fingerprint than a hash
+        self._polled_states: dict[str, dict] = {}
+        # {device_id: batch} of the writes still collecting datapoints
+        self._write_batches: dict[Any, _WriteBatch] = {}
+        # {device_id: task} sending the last batch of the device
+        self._write_tasks: dict[Any, asyncio.Task] = {}
+        # control commands merged into the write of another command
+        self.coalesced_writes = 0
+
+    def set_credentials(self, username, password):
+        """Set the credentials used for login and relogin."""
         if username:
             self.username = username
         if password:
             self.password = password
-        code, rsp_json = self.api.user_login(username, password)
-        if code and code == 200:
-            if rsp_json and XlinkFields.ACCESS_TOKEN in rsp_json:
-                return rsp_json[XlinkFields.USER_ID]
-            raise APIDATAEMPTYError("Reponse data empty!")
-        _LOGGER.error(
-            f"User authorize failed, username: {username}, password: {username}."
-        )
-        raise APIAuthError("Invalid credentials!")
+        self.api.auth.set_credentials(username, password)
 
     async def async_user_auth(self, username, password) -> str:
         """User login.
@@ -55,15 +100,15 @@ class PTP:
         :return: user_id, login success; Exception, login falied.
         :rtype: str
         """
-        if username:
-            self.username = username
-        if password:
-            self.password = password
-        code, rsp_json = await self.api.async_user_login(username, password)
+        self.set_credentials(username, password)
+        code, rsp_json = await self.api.auth.async_login(username, password)
         if code and code == 200:
             if rsp_json and XlinkFields.ACCESS_TOKEN in rsp_json:
                 return rsp_json[XlinkFields.USER_ID]
             raise APIDATAEMPTYError("Reponse data empty!")
+        if not code:
+            _LOGGER.error(f"User authorize request failed, username: {username}.")
+            raise APIREQUESTError("Request failed!")
         _LOGGER.error(
             f"User authorize failed, username: {username}, password: {username}."
         )
@@ -110,13 +155,7 @@ class PTP:
                         ha_supported_features = getattr(
                             model_class, "ha_supported_features"
                         )
-                        attributes = getattr(model_class, "attributes", {})
-                        properties = {}
-                        for field, func in attributes.items():
-                            if callable(func):
-                                ret, value = func({})
-                                if ret:
-                                    properties[field] = value
+                        properties = model_class.decode({})
                         devices.append(
                             DeviceEntity(
                                 product_id=device_info[XlinkFields.PRODUCT_ID],
@@ -130,6 +169,7 @@ class PTP:
                                 online=device_info[XlinkFields.ONLINE],
                                 properties=properties,
                                 raw_data=None,
+                                capabilities=model_class.descriptor({}),
                             )
                         )
                 return devices
@@ -142,6 +182,9 @@ class PTP:
     ) -> bool:
         """Control device.
 
+        Commands of a device within 'write_coalesce_window' are sent as one
+        write, every caller gets the result of that write.
+
         :return: True - success, False - failed.
         :rtype: bool
         """
@@ -155,8 +198,7 @@ class PTP:
                 if callable(func):
                     ret, dp = func(entity, value)
                     if ret:
-                        code, rsp_json = await self.api.async_send_multi_cmd(did, dp)
-                        if code and code == 200:
+                        if await self._async_write(did, dp):
                             return True
                         _LOGGER.error(f"Device control failed, pid: {pid}, did: {did}")
                     _LOGGER.warning(
@@ -166,72 +208,226 @@ class PTP:
             _LOGGER.warning(f"Unsupported service: {service}")
         return False
 
-    async def async_batch_device_state(self, devices: dict) -> dict:
-        """Batch request device states.
+    async def _async_write(self, did, dps: list[dict]) -> bool:
+        """Queue datapoints into the open write batch of a device.
 
-        :return: [{"device_id": {"properties":{}, "raw_data": {}}"},]
-        :rtype: dict
+        :return: True - the write holding them succeeded, False - failed.
+        :rtype: bool
         """
+        batch = self._write_batches.get(did)
+        if batch is None:
+            batch = _WriteBatch(self._write_tasks.get(did))
+            self._write_batches[did] = batch
+            self._write_tasks[did] = asyncio.get_running_loop().create_task(
+                self._async_send_batch(did, batch)
+            )
+        else:
+            self.coalesced_writes += 1
+        batch.add(dps)
+        future = asyncio.get_running_loop().create_future()
+        batch.futures.append(future)
+        return await future
+
+    async def _async_send_batch(self, did, batch: _WriteBatch):
+        """Send a write batch after the window and the previous write."""
+        try:
+            await asyncio.sleep(self.write_coalesce_window)
+            if batch.previous is not None:
+                # Its callers got its outcome, only the ordering matters here.
+                await asyncio.gather(batch.previous, return_exceptions=True)
+            # Commands from now on go into the next batch.
+            del self._write_batches[did]
+            code, rsp_json = await self.api.async_send_multi_cmd(
+                did, list(batch.datapoints.values())
+            )
+        except asyncio.CancelledError:
+            self._abandon_batch(did, batch, None)
+            raise
+        except Exception as err:
+            self._abandon_batch(did, batch, err)
+            return
+        finally:
+            if self._write_tasks.get(did) is asyncio.current_task():
+                del self._write_tasks[did]
+        for future in batch.futures:
+            if not future.done():
+                future.set_result(bool(code and code == 200))
+
+    def _abandon_batch(self, did, batch: _WriteBatch, err: Exception | None):
+        """Fail the callers of a batch that was not sent, None cancels them."""
+        if self._write_batches.get(did) is batch:
+            del self._write_batches[did]
+        for future in batch.futures:
+            if future.done():
+                continue
+            if err is None:
+                future.cancel()
+            else:
+                future.set_exception(err)
+
+    async def async_batch_device_state(
+        self, pid_to_devices: dict[str, list], only_changed: bool = True
+    ) -> tuple[dict, set]:
+        """Batch request device states.
 
-        pid_to_devices = {}
-        # Group devices by pid
-        for dev, pid in devices.items():
-            device_list = pid_to_devices.get(pid, [])
-            device_list.append(dev)
-            pid_to_devices[pid] = device_list
+        Product groups are split into chunks of 'batch_query_size' devices and
+        queried concurrently, at most 'batch_query_concurrency' at a time. Each
+        chunk is decoded into the result as soon as its response arrives. The
+        v_devices rate limit is widened to the number of chunks, so large
+        fleets are bounded by the concurrency, not by the token bucket.
+
+        With 'only_changed' a device whose raw state equals the one of the
+        previous poll is left out of the result, it is neither decoded nor
+        merged again.
+
+        A failed chunk does not discard the others, the result holds what was
+        answered and the product ids of the failed chunks. Only answered
+        states are remembered, a failed device is decoded again next time.
+
+        :param pid_to_devices: device ids grouped by product id, see DeviceTable.
+        :param only_changed: skip devices unchanged since the last poll.
+        :return: ({"device_id": {"properties": {}, "raw_data": {}, "capabilities": {}}},
+            {product ids with a failed chunk}).
+        :rtype: tuple
+        """
 
         devices_state = {}
-        # For each pid group, query the state and decode
-        for pid, devs in pid_to_devices.items():
-            code, rsp_json = await self.api.async_batch_query_vdevice(pid, devs)
-            if code == 200 and rsp_json:
-                states = rsp_json.get(XlinkFields.LIST, [])
-                model_class = XLINK_PHYSICAL_MODEL[pid]
-                if not model_class:
+        polled_states = {} if only_changed else None
+        semaphore = asyncio.Semaphore(self.batch_query_concurrency)
+
+        async def query_chunk(pid, devs):
+            async with semaphore:
+                return await self._async_query_chunk(
+                    pid, devs, devices_state, polled_states
+                )
+
+        size = self.batch_query_size
+        chunks = [
+            (pid, devs[start : start + size])
+            for pid, devs in pid_to_devices.items()
+            for start in range(0, len(devs), size)
+        ]
+        self.api.widen_rate_limit(
+            XlinkEndpoint.V_DEVICES, len(chunks) / self.batch_query_period, len(chunks)
+        )
+        queried = await asyncio.gather(*(query_chunk(*chunk) for chunk in chunks))
+        failed = {pid for (pid, _), ok in zip(chunks, queried) if not ok}
+        if failed:
+            _LOGGER.warning(f"Batch query failed for products: {sorted(failed)}")
+        if polled_states is not None:
+            # Failed chunks add no states, only answered devices are skipped
+            # by the next poll.
+            self._polled_states.update(polled_states)
+            _LOGGER.debug(
+                f"Batch query, {len(devices_state)} of {len(polled_states)} "
+                "devices changed"
+            )
+        return devices_state, failed
+
+    async def _async_query_chunk(
+        self, pid, devs, devices_state: dict, polled_states: dict | None = None
+    ):
+        """Query one chunk of a product group and decode it into 'devices_state'.
+
+        :param polled_states: collects the raw states of this poll, None to
+            decode every device.
+        :return: True - queried, False - failed.
+        :rtype: bool
+        """
+        code, rsp_json = await self.api.async_batch_query_vdevice(pid, devs)
+        if code == 200 and rsp_json:
+            states = rsp_json.get(XlinkFields.LIST, [])
+            model_class = XLINK_PHYSICAL_MODEL.get(pid)
+            if not model_class:
+                return True
+            changed = []
+            previous = self._polled_states
+            for state in states:
+                device_id = state.get("device_id")
+                if not device_id:
                     continue
-                attributes = getattr(model_class, "attributes", {})
-                for state in states:
-                    device_id = state.get("device_id")
-                    if not device_id:
+                device_id = normalize_device_id(device_id)
+                if polled_states is not None:
+                    polled_states[device_id] = state
+                    if previous.get(device_id) == state:
                         continue
-                    if isinstance(device_id, int):
-                        device_id = str(device_id)
-                    device_state = {}
-                    properties = {}
-                    for field, func in attributes.items():
-                        if callable(func):
-                            ret, value = func(state)
-                            if ret:
-                                properties[field] = value
-                    device_state["properties"] = properties
-                    device_state["raw_data"] = state
-                    devices_state[device_id] = device_state
-            elif code == 403 and rsp_json:
-                _LOGGER.warning(
-                    f"Batch query request was forbidden, error message: {rsp_json}"
+                changed.append((device_id, state))
+            threshold = self.columnar_decode_min_devices
+            if threshold and len(changed) >= threshold:
+                decoded = model_class.decode_columns(
+                    [state for _, state in changed]
                 )
-                await self.async_user_auth(self.username, self.password)
-                return None
             else:
-                _LOGGER.error(
-                    f"Batch query v_devices failed, pid: {pid}, devices: {str(devs)}"
-                )
+                decoded = map(model_class.decode, (state for _, state in changed))
+            descriptor = model_class.descriptor
+            for (device_id, state), properties in zip(changed, decoded):
+                devices_state[device_id] = {
+                    "properties": properties,
+                    "raw_data": state,
+                    "capabilities": descriptor(state),
+                }
+            return True
+        if code == 403 and rsp_json:
+            # The transport already refreshed the token and retried once.
+            _LOGGER.warning(
+                f"Batch query request was forbidden, error message: {rsp_json}"
+            )
+        else:
+            _LOGGER.error(
+                f"Batch query v_devices failed, pid: {pid}, devices: {str(devs)}"
+            )
+        return False
 
-        # Check wether access token is going to be timeout. If it is, refresh token.
-        is_valid = self.api.authorization_validate(timedelta=6900)
-        if not is_valid:
-            code, rsp_json = await self.api.async_refresh_token()
-            if code == 200:
-                _LOGGER.info("Refresh token and refresh token successfully")
-            elif code == 403:
-                _LOGGER.warning(
-                    f"Refresh token request was forbidden, error message: {rsp_json}"
-                )
-                await self.async_user_auth(self.username, self.password)
-            else:
-                _LOGGER.error(f"Refresh token failed, error message: {rsp_json}")
+    def product_poll_interval(self, pid) -> float:
+        """Min seconds between polls of a product group, see the model class."""
+        return getattr(XLINK_PHYSICAL_MODEL.get(pid), "poll_interval", 0)
+
+    def reported_value(
+        self, entity: DeviceEntity, service: str, field: str, value: Any
+    ) -> Any:
+        """Value of 'field' the device reports once 'service' wrote 'value'.
 
-        return devices_state
+        The written datapoints are decoded over the last raw state of the
+        device. Some mappings are lossy, e.g. FAN_HIGH is written as the raw
+        value of medium on direct fan machine types.
+
+        :return: decoded value, 'value' when the model does not encode it.
+        """
+        model_class = XLINK_PHYSICAL_MODEL.get(entity.product_id)
+        func = getattr(model_class, "services", {}).get(service)
+        if not callable(func):
+            return value
+        state = dict(entity.raw_data or {})
+        ret, dps = func(entity, value)
+        if not ret:
+            return value
+        for dp in dps:
+            state[str(dp["index"])] = dp["value"]
+        return model_class.decode(state).get(field, value)
+
+    def forget_states(self, device_ids: list | None = None):
+        """Forget polled states, the next poll decodes those devices.
+
+        :param device_ids: normalized device ids, None for every device.
+        """
+        if device_ids is None:
+            self._polled_states.clear()
+            return
+        for device_id in device_ids:
+            self._polled_states.pop(device_id, None)
+
+    def invalidate_metadata(self):
+        """Forget cached homes and home devices, the next query downloads them."""
+        self.api.metadata_cache.invalidate()
+
+    @property
+    def online(self) -> bool:
+        """Whether the cloud is currently considered reachable."""
+        return self.api.online
+
+    async def async_close(self):
+        """Release the connection pool of the underlying api client."""
+        await self.api.async_close()
 
     def authorization_validate(self, timedelta=0):
         """Check whether access token is going to be timeout in 'timedelta' seconds.
@@ -0,0 +1,136 @@
+"""Retry and circuit breaker policies for the Xlink http transport."""
+
+import asyncio
+from dataclasses import dataclass, field
+from enum import StrEnum
+import logging
+import random
+import time
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry policy of one idempotency class.
+
+    Reads may be repeated after any transient failure. Writes are only
+    repeated when the request can not have reached the cloud: the connection
+    was never established or the cloud rejected it with a 429.
+    """
+
+    attempts: int
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_statuses: frozenset = field(default_factory=frozenset)
+    retry_unsent_only: bool = False
+
+    def should_retry_status(self, status, attempt: int) -> bool:
+        """Whether a response status is worth another attempt."""
+        return attempt + 1 < self.attempts and status in self.retry_statuses
+
+    def should_retry_error(self, err: Exception, attempt: int) -> bool:
+        """Whether a transport error is worth another attempt."""
+        if attempt + 1 >= self.attempts:
+            return False
+        if isinstance(err, aiohttp.ClientConnectorError):
+            return True
+        if self.retry_unsent_only:
+            return False
+        return isinstance(err, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter.
+
+        :param attempt: zero based number of the failed attempt.
+        :return: seconds to sleep before the next attempt.
+        :rtype: float
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+READ_RETRY_POLICY = RetryPolicy(
+    attempts=3, retry_statuses=frozenset({429, 500, 502, 503, 504})
+)
+
+WRITE_RETRY_POLICY = RetryPolicy(
+    attempts=2, retry_statuses=frozenset({429}), retry_unsent_only=True
+)
+
+
+class CircuitState(StrEnum):
+    """Circuit breaker states."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast while the cloud is unreachable.
+
+    After 'failure_threshold' consecutive failures the circuit opens and
+    requests are rejected without touching the network. Once
+    'recovery_timeout' seconds have passed a single probe request is let
+    through, its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        """Initiate CircuitBreaker class."""
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = None
+
+    @property
+    def closed(self) -> bool:
+        """True while requests flow normally."""
+        return self.state == CircuitState.CLOSED
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now.
+
+        :return: True - send, False - fail fast.
+        :rtype: bool
+        """
+        if self.state == CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN:
+            if now - self._opened_at < self.recovery_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_at = None
+        # A probe which never reported back (e.g. cancelled) is replaced.
+        if self._probe_at is None or now - self._probe_at > self.recovery_timeout:
+            self._probe_at = now
+            return True
+        return False
+
+    def record_success(self):
+        """Close the circuit after a successful request."""
+        if self.state != CircuitState.CLOSED:
+            _LOGGER.info("Xlink cloud reachable again, circuit closed")
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._probe_at = None
+
+    def record_failure(self):
+        """Count a failed request, opening the circuit at the threshold."""
+        self._failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self._failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                _LOGGER.warning(
+                    "Xlink cloud unreachable, circuit open for "
+                    f"{self.recovery_timeout}s"
+                )
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_at = None
@@ -0,0 +1,267 @@
+"""Request scheduling for the Xlink http transport.
+
+Bounds the number of requests in flight, spaces requests per endpoint with
+token buckets and honours Retry-After hints of the cloud, so bursts of calls
+queue up instead of hitting api2.xlink.cn at once.
+
+Requests are served by priority. The priority is taken from the context of
+the caller, code run under prioritized(RequestPriority.INTERACTIVE) (and the
+tasks it starts) overtakes background polls and metadata fetches.
+"""
+
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import datetime
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+import time
+
+from .xlink_metrics import LatencyHistogram
+
+_LOGGER = logging.getLogger(__name__)
+
+# upper bound of a single Retry-After pause in seconds
+MAX_RETRY_AFTER = 300
+
+
+def parse_retry_after(value) -> float | None:
+    """Parse a Retry-After header.
+
+    :param value: header value, delta seconds or http date.
+    :return: seconds to wait, None if absent or invalid.
+    :rtype: float
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=datetime.UTC)
+        seconds = (retry_at - datetime.datetime.now(datetime.UTC)).total_seconds()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RequestPriority(IntEnum):
+    """Scheduling priority of a request, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# priority of the requests sent from the current context
+request_priority: ContextVar[RequestPriority] = ContextVar(
+    "request_priority", default=RequestPriority.BACKGROUND
+)
+
+
+@contextmanager
+def prioritized(priority: RequestPriority):
+    """Send the requests of the block, and of tasks it starts, at 'priority'."""
+    token = request_priority.set(priority)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class PrioritySemaphore:
+    """Semaphore granting free slots to the most important waiter first.
+
+    Waiters of equal priority are served in FIFO order. 'reserved' slots are
+    only granted to interactive requests, so they never wait for a slot held
+    by a large poll.
+    """
+
+    def __init__(self, value: int, reserved: int = 0) -> None:
+        """Initiate PrioritySemaphore class.
+
+        :param value: number of slots.
+        :param reserved: slots kept free for interactive requests.
+        """
+        self._free = value
+        self._reserved = min(reserved, value - 1)
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # queued waiters per priority
+        self.waiting: Counter = Counter()
+
+    def _available(self, priority: RequestPriority) -> bool:
+        if priority == RequestPriority.INTERACTIVE:
+            return self._free > 0
+        return self._free > self._reserved
+
+    async def acquire(self, priority: RequestPriority):
+        """Wait for a slot."""
+        if (
+            not self._waiters or self._waiters[0][0] > priority
+        ) and self._available(priority):
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.waiting[priority] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted while being cancelled, hand the slot on.
+                self.release()
+            else:
+                self.waiting[priority] -= 1
+            raise
+
+    def release(self):
+        """Free a slot and grant it to the next waiter."""
+        self._free += 1
+        waiters = self._waiters
+        while waiters:
+            priority, _, future = waiters[0]
+            if future.done():
+                heapq.heappop(waiters)
+                continue
+            if not self._available(priority):
+                break
+            heapq.heappop(waiters)
+            self.waiting[priority] -= 1
+            self._free -= 1
+            future.set_result(None)
+
+
+class TokenBucket:
+    """Token bucket, waiters are served by priority, then in FIFO order."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Initiate TokenBucket class.
+
+        :param rate: tokens refilled per second.
+        :param capacity: max burst size.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._locks = {priority: asyncio.Lock() for priority in RequestPriority}
+
+    def widen(self, rate: float, capacity: int):
+        """Raise rate and burst size to at least 'rate' and 'capacity'.
+
+        The added burst is available at once, limits are never lowered.
+        """
+        self._refill(time.monotonic())
+        if capacity > self.capacity:
+            self._tokens += capacity - self.capacity
+            self.capacity = capacity
+        self.rate = max(self.rate, rate)
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _overtaken(self, priority: RequestPriority) -> bool:
+        """Whether a more important request waits for a token."""
+        return any(
+            self._locks[other].locked()
+            for other in RequestPriority
+            if other < priority
+        )
+
+    async def async_acquire(self, priority=RequestPriority.BACKGROUND):
+        """Wait until a token is available and take it."""
+        async with self._locks[priority]:
+            while True:
+                self._refill(time.monotonic())
+                if self._tokens >= 1 and not self._overtaken(priority):
+                    self._tokens -= 1
+                    return
+                # Behind a more important waiter wait for the next token.
+                missing = 1 - self._tokens if self._tokens < 1 else 1
+                await asyncio.sleep(missing / self.rate)
+
+
+class XlinkRequestScheduler:
+    """Admission control for requests of one Xlink client."""
+
+    def __init__(
+        self, max_concurrency: int, endpoint_rates: dict, reserved: int = 0
+    ) -> None:
+        """Initiate XlinkRequestScheduler class.
+
+        :param max_concurrency: max requests in flight.
+        :param endpoint_rates: {endpoint: (requests per second, burst)}.
+        :param reserved: slots of max_concurrency kept for interactive requests.
+        """
+        self._semaphore = PrioritySemaphore(max_concurrency, reserved)
+        self._in_flight: Counter = Counter()
+        # seconds from asking to getting a slot, per priority
+        self.wait = {priority: LatencyHistogram() for priority in RequestPriority}
+        self._buckets = {
+            endpoint: TokenBucket(rate, capacity)
+            for endpoint, (rate, capacity) in endpoint_rates.items()
+        }
+        self._resume_at = 0.0
+
+    def widen(self, endpoint, rate: float, capacity: int):
+        """Raise the rate limit of a limited endpoint, see TokenBucket.widen.
+
+        :param endpoint: endpoint label, unlimited endpoints stay unlimited.
+        :param rate: min requests per second.
+        :param capacity: min burst size.
+        """
+        bucket = self._buckets.get(endpoint)
+        if bucket is not None:
+            bucket.widen(rate, capacity)
+
+    def defer(self, seconds: float):
+        """Hold back all new requests for 'seconds', e.g. after a 429.
+
+        :param seconds: pause length.
+        """
+        resume_at = time.monotonic() + seconds
+        if resume_at > self._resume_at:
+            _LOGGER.warning(f"Xlink cloud asked to back off for {seconds:.1f}s")
+            self._resume_at = resume_at
+
+    @asynccontextmanager
+    async def async_slot(self, endpoint=None):
+        """Wait for the endpoint rate limit and a free concurrency slot.
+
+        :param endpoint: endpoint label, None for unlimited endpoints.
+        """
+        priority = request_priority.get()
+        queued_at = time.monotonic()
+        bucket = self._buckets.get(endpoint)
+        if bucket is not None:
+            await bucket.async_acquire(priority)
+        while (delay := self._resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        await self._semaphore.acquire(priority)
+        self.wait[priority].record(time.monotonic() - queued_at)
+        self._in_flight[priority] += 1
+        try:
+            yield
+        finally:
+            self._in_flight[priority] -= 1
+            self._semaphore.release()
+
+    def as_dict(self) -> dict:
+        """Queue depth, requests in flight and wait time per priority."""
+        return {
+            priority.name.lower(): {
+                "queued": self._semaphore.waiting[priority],
+                "in_flight": self._in_flight[priority],
+                "wait": self.wait[priority].as_dict(),
+            }
+            for priority in RequestPriority
+        }
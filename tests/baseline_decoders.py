@@ -0,0 +1,346 @@
+"""Per-field decoders of the physical models before they became datapoint specs.
+
+Kept as they were, they are the reference the compiled decoders of
+test_datapoint.py are checked against.
+"""
+
+from homeassistant.components.climate import (
+    ATTR_CURRENT_HUMIDITY,
+    ATTR_CURRENT_TEMPERATURE,
+    ATTR_FAN_MODE,
+    ATTR_FAN_MODES,
+    ATTR_HVAC_ACTION,
+    ATTR_HVAC_MODE,
+    ATTR_HVAC_MODES,
+    ATTR_MAX_HUMIDITY,
+    ATTR_MAX_TEMP,
+    ATTR_MIN_HUMIDITY,
+    ATTR_MIN_TEMP,
+    ATTR_PRESET_MODE,
+    ATTR_PRESET_MODES,
+    ATTR_TARGET_TEMP_HIGH,
+    ATTR_TARGET_TEMP_LOW,
+    ATTR_TARGET_TEMP_STEP,
+    FAN_AUTO,
+    FAN_FOCUS,
+    FAN_HIGH,
+    FAN_LOW,
+    FAN_MEDIUM,
+    FAN_TOP,
+    HVACAction,
+    HVACMode,
+    PRESET_NONE,
+    PRESET_SLEEP,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_TEMPERATURE,
+)
+
+
+class AirUnit:
+    """ST2000 and ST830 air units."""
+
+    @staticmethod
+    def attr_current_humidity(state: dict) -> tuple:
+        if "117" in state:
+            value = state["117"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_current_temperature(state: dict) -> tuple:
+        if "116" in state:
+            value = state["116"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_fan_mode(state: dict) -> tuple:
+        alternating = {
+            "0": (True, FAN_AUTO),
+            "1": (True, FAN_LOW),
+            "2": (True, FAN_MEDIUM),
+            "3": (True, FAN_HIGH),
+        }
+        direct = {
+            "0": (True, FAN_AUTO),
+            "1": (True, FAN_FOCUS),
+            "2": (True, FAN_LOW),
+            "3": (True, FAN_MEDIUM),
+            "4": (True, FAN_HIGH),
+            "5": (True, FAN_TOP),
+        }
+        default = {
+            "1": (True, FAN_LOW),
+            "2": (True, FAN_MEDIUM),
+            "3": (True, FAN_HIGH),
+        }
+        enum_v = alternating
+        if "2" in state and "6" in state:
+            machine_type = state["2"]
+            fan_mode = state["6"]
+            if isinstance(fan_mode, int):
+                fan_mode = str(fan_mode)
+            if machine_type in [0, 3, 4, 5, 15, 18]:
+                enum_v = alternating
+            elif machine_type in [1, 6, 7, 8, 16, 19, 20, 21, 22, 23, 24, 25, 82]:
+                enum_v = direct
+            elif machine_type == 80:
+                enum_v = default
+            if fan_mode in enum_v:
+                return enum_v[fan_mode]
+            return (False, None)
+        return (False, None)
+
+    @staticmethod
+    def attr_fan_modes(state: dict) -> tuple:
+        alternating = [FAN_AUTO, FAN_LOW, FAN_MEDIUM, FAN_HIGH]
+        direct = [FAN_AUTO, FAN_FOCUS, FAN_LOW, FAN_MEDIUM, FAN_HIGH, FAN_TOP]
+        default = [FAN_LOW, FAN_MEDIUM, FAN_HIGH]
+
+        if "2" in state:
+            machine_type = state["2"]
+            if machine_type in [0, 3, 4, 5, 15, 18]:
+                return (True, alternating)
+            elif machine_type in [1, 6, 7, 8, 16, 19, 20, 21, 22, 23, 24, 25, 82]:
+                return (True, direct)
+            elif machine_type == 80:
+                return (True, default)
+        return (True, alternating)
+
+    @staticmethod
+    def attr_hvac_action(state: dict) -> tuple:
+        if "0" in state and "1" in state and "130" in state:
+            switch = state["0"]
+            mode = state["1"]
+            idle_bit = state["130"]
+            if switch == 0:
+                return (True, HVACAction.OFF)
+            elif switch == 1:
+                # bit6: cooling standby; bit7: heating standby.
+                if (idle_bit & 0xC0) > 0:
+                    return (True, HVACAction.IDLE)
+                if mode == 0:
+                    return (True, HVACAction.COOLING)
+                elif mode == 1:
+                    return (True, HVACAction.HEATING)
+
+            return (False, None)
+        return (False, None)
+
+    @staticmethod
+    def attr_hvac_mode(state: dict) -> tuple:
+        if "0" in state:
+            switch = state["0"]
+            if switch == 0:
+                return (True, HVACMode.OFF)
+        if "3" in state:
+            user_mode = state["3"]
+            if user_mode == 3:
+                return (True, HVACMode.DRY)
+            elif user_mode == 7:
+                return (True, HVACMode.FAN_ONLY)
+        if "1" in state:
+            main_mode = state["1"]
+            if main_mode == 0:
+                return (True, HVACMode.COOL)
+            elif main_mode == 1:
+                return (True, HVACMode.HEAT)
+        return (False, None)
+
+    @staticmethod
+    def attr_hvac_modes(state: dict) -> tuple:
+        hvac_modes = [
+            HVACMode.OFF,
+            HVACMode.DRY,
+            HVACMode.FAN_ONLY,
+            HVACMode.COOL,
+            HVACMode.HEAT,
+        ]
+        return (True, hvac_modes)
+
+    @staticmethod
+    def attr_max_humidity(state: dict) -> tuple:
+        return (True, 75)
+
+    @staticmethod
+    def attr_min_humidity(state: dict) -> tuple:
+        return (True, 40)
+
+    @staticmethod
+    def attr_max_temp(state: dict) -> tuple:
+        return (True, 35)
+
+    @staticmethod
+    def attr_min_temp(state: dict) -> tuple:
+        return (True, 5)
+
+    @staticmethod
+    def attr_preset_mode(state: dict) -> tuple:
+        if "4" in state:
+            sleep_switch = state["4"]
+            if sleep_switch == 1:
+                return (True, PRESET_SLEEP)
+            else:
+                return (True, PRESET_NONE)
+        return (False, None)
+
+    @staticmethod
+    def attr_preset_modes(state: dict) -> tuple:
+        preset_modes = [PRESET_NONE, PRESET_SLEEP]
+        return (True, preset_modes)
+
+    @staticmethod
+    def attr_target_humidity(state: dict) -> tuple:
+        if "8" in state:
+            value = state["8"]
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_target_temperature(state: dict) -> tuple:
+        if "7" in state:
+            value = state["7"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_target_temperature_high(state: dict) -> tuple:
+        return (True, 35)
+
+    @staticmethod
+    def attr_target_temperature_low(state: dict) -> tuple:
+        return (True, 5)
+
+    @staticmethod
+    def attr_target_temperature_step(state: dict) -> tuple:
+        return (True, 0.5)
+
+    attributes = {
+        ATTR_CURRENT_HUMIDITY: attr_current_humidity,
+        ATTR_CURRENT_TEMPERATURE: attr_current_temperature,
+        ATTR_FAN_MODE: attr_fan_mode,
+        ATTR_FAN_MODES: attr_fan_modes,
+        ATTR_HVAC_ACTION: attr_hvac_action,
+        ATTR_HVAC_MODE: attr_hvac_mode,
+        ATTR_HVAC_MODES: attr_hvac_modes,
+        ATTR_MAX_HUMIDITY: attr_max_humidity,
+        ATTR_MIN_HUMIDITY: attr_min_humidity,
+        ATTR_MAX_TEMP: attr_max_temp,
+        ATTR_MIN_TEMP: attr_min_temp,
+        ATTR_PRESET_MODE: attr_preset_mode,
+        ATTR_PRESET_MODES: attr_preset_modes,
+        SERVICE_SET_HUMIDITY: attr_target_humidity,
+        SERVICE_SET_TEMPERATURE: attr_target_temperature,
+        ATTR_TARGET_TEMP_HIGH: attr_target_temperature_high,
+        ATTR_TARGET_TEMP_LOW: attr_target_temperature_low,
+        ATTR_TARGET_TEMP_STEP: attr_target_temperature_step,
+    }
+
+
+class FloorHeating:
+    """ST1800-HN floor heating."""
+
+    @staticmethod
+    def attr_current_humidity(state: dict) -> tuple:
+        if "21" in state:
+            value = state["21"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_current_temperature(state: dict) -> tuple:
+        if "20" in state:
+            value = state["20"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_hvac_action(state: dict) -> tuple:
+        if "0" in state and "23" in state:
+            switch = state["0"]
+            idle_bit = state["23"]
+            if switch == 0:
+                return (True, HVACAction.OFF)
+            elif switch == 1:
+                # bit6: cooling standby; bit7: heating standby.
+                if (idle_bit & 0x40) > 0:
+                    return (True, HVACAction.IDLE)
+                else:
+                    return (True, HVACAction.HEATING)
+            return (False, None)
+        return (False, None)
+
+    @staticmethod
+    def attr_hvac_mode(state: dict) -> tuple:
+        if "0" in state:
+            switch = state["0"]
+            if switch == 0:
+                return (True, HVACMode.OFF)
+            else:
+                return (True, HVACMode.HEAT)
+        return (False, None)
+
+    @staticmethod
+    def attr_hvac_modes(state: dict) -> tuple:
+        hvac_modes = [
+            HVACMode.OFF,
+            HVACMode.HEAT,
+        ]
+        return (True, hvac_modes)
+
+    @staticmethod
+    def attr_max_temp(state: dict) -> tuple:
+        return (True, 50)
+
+    @staticmethod
+    def attr_min_temp(state: dict) -> tuple:
+        return (True, 5)
+
+    @staticmethod
+    def attr_target_temperature(state: dict) -> tuple:
+        if "1" in state:
+            value = state["1"]
+            value = value / 10
+            return (True, value)
+        return (False, None)
+
+    @staticmethod
+    def attr_target_temperature_high(state: dict) -> tuple:
+        return (True, 50)
+
+    @staticmethod
+    def attr_target_temperature_low(state: dict) -> tuple:
+        return (True, 5)
+
+    @staticmethod
+    def attr_target_temperature_step(state: dict) -> tuple:
+        return (True, 0.5)
+
+    attributes = {
+        ATTR_CURRENT_HUMIDITY: attr_current_humidity,
+        ATTR_CURRENT_TEMPERATURE: attr_current_temperature,
+        ATTR_HVAC_ACTION: attr_hvac_action,
+        ATTR_HVAC_MODE: attr_hvac_mode,
+        ATTR_HVAC_MODES: attr_hvac_modes,
+        ATTR_MAX_TEMP: attr_max_temp,
+        ATTR_MIN_TEMP: attr_min_temp,
+        SERVICE_SET_TEMPERATURE: attr_target_temperature,
+        ATTR_TARGET_TEMP_HIGH: attr_target_temperature_high,
+        ATTR_TARGET_TEMP_LOW: attr_target_temperature_low,
+        ATTR_TARGET_TEMP_STEP: attr_target_temperature_step,
+    }
+
+
+def decode(model, state: dict) -> dict:
+    """Decode a raw state like PTP did with the 'attributes' of a model."""
+    properties = {}
+    for field, func in model.attributes.items():
+        ret, value = func(state)
+        if ret:
+            properties[field] = value
+    return properties
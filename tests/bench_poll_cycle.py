@@ -0,0 +1,317 @@
+"""Poll-cycle benchmark of MyCoordinator.async_update_data.
+
+Runs complete poll cycles for fleets of 10 to 10,000 devices spread over the
+registered ST2000 / ST830 product ids. The http session of the Xlink client is
+replaced by an in-process fake serving the fleet of tests/xlink_server.py.
+Requests still pass the request scheduler, its concurrency slots and token
+buckets, and bodies go through the json codec, so the numbers cover
+scheduling and encode/decode but no network.
+
+Per fleet size it reports the median of:
+- wall time of a cycle
+- transport time, wall time with at least one request in flight
+- decode time, PTP.async_batch_device_state minus transport
+- merge time, the rest of the coordinator update
+- peak traced memory and net allocated blocks of a cycle (separate pass)
+
+Usage (needs homeassistant installed):
+
+    python tests/bench_poll_cycle.py --save poll_cycle_baseline.json
+    python tests/bench_poll_cycle.py --compare poll_cycle_baseline.json
+    python tests/bench_poll_cycle.py --churn 0   # unchanged polls only
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import frame  # noqa: E402
+
+from custom_components.linkedgo_bridge.coordinator import MyCoordinator  # noqa: E402
+from custom_components.linkedgo_bridge.hub import Hub  # noqa: E402
+from custom_components.linkedgo_bridge.xlink_api import XlinkAPI  # noqa: E402
+from custom_components.linkedgo_bridge.xlink_ptp import PTP, PTPFields  # noqa: E402
+from xlink_server import PID_ST1800_HN, build_fleet  # noqa: E402
+
+FLEET_SIZES = (10, 100, 1000, 10000)
+
+# share of devices whose reading changes between polls, with none every poll
+# after the first is skipped by the unchanged-state check before decoding
+DEFAULT_CHURN = 0.1
+
+HOME_ID = 1
+
+
+class FakeResponse:
+    """aiohttp response of a FakeXlinkSession request."""
+
+    def __init__(self, status: int, body: bytes) -> None:
+        """Initiate FakeResponse class."""
+        self.status = status
+        self.headers = {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+class FakeXlinkSession:
+    """Stand-in for the aiohttp session of XlinkAPI serving a stub fleet.
+
+    Requests still pass the scheduler, its concurrency slots and token
+    buckets, only the network round trip is replaced.
+    """
+
+    closed = False
+
+    def __init__(self, devices, codec, churn: float = 0.0) -> None:
+        """Initiate FakeXlinkSession class.
+
+        :param churn: probability that a device reading changes between polls.
+        """
+        self.devices = {device.device_id: device for device in devices}
+        self.codec = codec
+        self.churn = churn
+        self.requests = 0
+        self._rng = random.Random(0)
+
+    def request(self, method, url, headers=None, data=None) -> FakeResponse:
+        self.requests += 1
+        body = self.codec.loads(data) if data else None
+        path = urlsplit(url).path.split("/")
+        if path[-1] == "v_devices":
+            product_id = path[3]
+            states = []
+            for device_id in body:
+                device = self.devices.get(int(device_id))
+                if device is not None and device.product_id == product_id:
+                    if self.churn and self._rng.random() < self.churn:
+                        index = "20" if product_id == PID_ST1800_HN else "116"
+                        device.state[index] += self._rng.choice((-1, 1))
+                    states.append({"device_id": device.device_id, **device.state})
+            rsp = {"count": len(states), "list": states}
+        elif path[-1] == "devices":
+            rsp = {
+                "list": [
+                    {
+                        "id": device.device_id,
+                        "product_id": device.product_id,
+                        "mac": device.mac,
+                        "name": device.name,
+                        "mcu_version": 3,
+                        "is_online": device.online,
+                    }
+                    for device in self.devices.values()
+                ]
+            }
+        else:
+            rsp = {}
+        return FakeResponse(200, self.codec.dumps(rsp))
+
+
+class SpanTimer:
+    """Wall time during which at least one timed call is running."""
+
+    def __init__(self) -> None:
+        """Initiate SpanTimer class."""
+        self.total = 0.0
+        self._active = 0
+        self._started = 0.0
+
+    def wrap(self, func):
+        """Time every call of the coroutine function 'func'."""
+
+        async def timed(*args, **kwargs):
+            if not self._active:
+                self._started = time.perf_counter()
+            self._active += 1
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._active -= 1
+                if not self._active:
+                    self.total += time.perf_counter() - self._started
+
+        return timed
+
+
+async def async_build_coordinator(
+    hass: HomeAssistant, size: int, columnar: int = 0, churn: float = 0.0
+):
+    """Coordinator wired to a fake transport serving 'size' devices."""
+    # ST1800-HN is not in XLINK_PHYSICAL_MODEL, its devices would be dropped.
+    devices = build_fleet(st2000=size - size // 2, st830=size // 2)
+    config_entry = SimpleNamespace(
+        data={PTPFields.HOME_ID: HOME_ID},
+        options={},
+        unique_id=str(HOME_ID),
+    )
+    ptp = PTP(session=FakeXlinkSession(devices, XlinkAPI.codec, churn))
+    ptp.columnar_decode_min_devices = columnar
+    # Cycles run back to back, not once per poll interval, widen the v_devices
+    # bucket to refill in time so a cycle is not held by the previous one.
+    ptp.batch_query_period = 0.001
+    coordinator = MyCoordinator(hass, config_entry, Hub(hass, ptp))
+    transport = SpanTimer()
+    batch = SpanTimer()
+    ptp.api.send_request_async = transport.wrap(ptp.api.send_request_async)
+    ptp.async_batch_device_state = batch.wrap(ptp.async_batch_device_state)
+    # The first cycle loads the device list, it is not measured.
+    coordinator.data = await coordinator.async_update_data()
+    return coordinator, transport, batch
+
+
+async def async_measure(
+    hass: HomeAssistant,
+    size: int,
+    cycles: int,
+    columnar: int = 0,
+    churn: float = 0.0,
+) -> dict:
+    """Measure 'cycles' poll cycles of a fleet of 'size' devices."""
+    coordinator, transport, batch = await async_build_coordinator(
+        hass, size, columnar, churn
+    )
+    samples = {"wall_ms": [], "transport_ms": [], "decode_ms": [], "merge_ms": []}
+    for _ in range(cycles):
+        transport.total = batch.total = 0.0
+        started = time.perf_counter()
+        coordinator.data = await coordinator.async_update_data()
+        wall = time.perf_counter() - started
+        samples["wall_ms"].append(wall * 1000)
+        samples["transport_ms"].append(transport.total * 1000)
+        samples["decode_ms"].append((batch.total - transport.total) * 1000)
+        samples["merge_ms"].append((wall - batch.total) * 1000)
+    result = {key: round(statistics.median(values), 3) for key, values in samples.items()}
+
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    coordinator.data = await coordinator.async_update_data()
+    _, peak = tracemalloc.get_traced_memory()
+    result["net_blocks"] = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+    result["peak_kib"] = round((peak - base) / 1024, 1)
+    result["devices"] = len(coordinator.data)
+    result["changed"] = coordinator.changed_devices
+    return result
+
+
+async def async_run(
+    sizes, cycles: int, columnar: int = 0, churn: float = 0.0
+) -> dict:
+    """Run the benchmark for every fleet size."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+        results = {}
+        for size in sizes:
+            results[str(size)] = await async_measure(
+                hass,
+                size,
+                max(3, cycles if size < 10000 else cycles // 3),
+                columnar,
+                churn,
+            )
+            print(f"{size:>6} devices: {json.dumps(results[str(size)])}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cycles": cycles,
+            "columnar_decode_min_devices": columnar,
+            "churn": churn,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print the change against a baseline.
+
+    :return: False when a wall time regressed by more than 'threshold'.
+    :rtype: bool
+    """
+    ok = True
+    print(f"{'size':>6} {'metric':>13} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, result in current["results"].items():
+        base = baseline["results"].get(size)
+        if base is None:
+            continue
+        for key in ("wall_ms", "transport_ms", "decode_ms", "merge_ms", "peak_kib"):
+            if key not in base:
+                continue
+            change = (result[key] - base[key]) / base[key] if base[key] else 0.0
+            print(
+                f"{size:>6} {key:>13} {base[key]:>10.3f} {result[key]:>10.3f} "
+                f"{change:>+8.1%}"
+            )
+            if key == "wall_ms" and change > threshold:
+                ok = False
+    return ok
+
+
+def main() -> int:
+    """Command line entry."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(FLEET_SIZES))
+    parser.add_argument("--cycles", type=int, default=9)
+    parser.add_argument(
+        "--columnar",
+        type=int,
+        default=0,
+        help="PTP.columnar_decode_min_devices, 0 decodes per device",
+    )
+    parser.add_argument(
+        "--churn",
+        type=float,
+        default=DEFAULT_CHURN,
+        help="probability that a device reading changes between polls",
+    )
+    parser.add_argument("--save", type=Path, help="write results as json baseline")
+    parser.add_argument("--compare", type=Path, help="compare with a json baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="allowed relative wall time regression in compare mode",
+    )
+    args = parser.parse_args()
+
+    current = asyncio.run(
+        async_run(args.sizes, args.cycles, args.columnar, args.churn)
+    )
+    if args.save:
+        args.save.write_text(json.dumps(current, indent=2) + "\n")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if not compare(baseline, current, args.threshold):
+            print("wall time regression above threshold")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Fixtures of the linkedgo_bridge tests.
+
+Needs pytest-homeassistant-custom-component installed, see
+requirements_test.txt. Tests of the transport talk to the XlinkStubServer
+of xlink_server.py on a local port.
+
+    python -m pytest tests
+"""
+
+from pathlib import Path
+import sys
+
+import pytest_asyncio
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.linkedgo_bridge.xlink_ptp import PTP  # noqa: E402
+from xlink_server import XlinkStubServer, build_fleet  # noqa: E402
+
+USERNAME = "13800000000"
+PASSWORD = "password"
+
+
+@pytest_asyncio.fixture
+async def stub_server(socket_enabled):
+    """Stub cloud serving two devices of each registered model."""
+    server = XlinkStubServer(build_fleet(st2000=2, st830=2))
+    await server.async_start()
+    yield server
+    await server.async_stop()
+
+
+@pytest_asyncio.fixture
+async def ptp(stub_server):
+    """PTP logged in to the stub cloud."""
+    ptp = PTP()
+    ptp.api.base_url = stub_server.url
+    await ptp.async_user_auth(USERNAME, PASSWORD)
+    yield ptp
+    await ptp.async_close()
+
@@ -0,0 +1,226 @@
+"""Optimistic controls and change-filtered state writes of MyThermostat."""
+
+import asyncio
+import logging
+
+import pytest
+
+from homeassistant.components.climate import (
+    ATTR_FAN_MODE,
+    FAN_AUTO,
+    FAN_HIGH,
+    FAN_LOW,
+    FAN_MEDIUM,
+    SERVICE_SET_FAN_MODE,
+    SERVICE_SET_TEMPERATURE,
+)
+
+from custom_components.linkedgo_bridge.climate import MyThermostat
+from custom_components.linkedgo_bridge.const import DeviceEntity
+from custom_components.linkedgo_bridge.physical_model import ST2000
+from custom_components.linkedgo_bridge.xlink_ptp import PTP
+from xlink_server import PID_ST2000
+
+pytestmark = pytest.mark.asyncio
+
+# raw state of a direct fan machine type (dp 2), fan medium, 20.0 degrees
+RAW_STATE = {"0": 1, "1": 1, "2": 1, "3": 0, "4": 0, "6": 3, "7": 200, "8": 50}
+
+
+class StubCoordinator:
+    """Coordinator of a thermostat, only what the entity calls."""
+
+    last_update_success = True
+
+    def __init__(self, hass) -> None:
+        self.hass = hass
+        self.controls = 0
+
+    def async_add_listener(self, update_callback, context=None):
+        return lambda: None
+
+    def async_note_control(self):
+        self.controls += 1
+
+
+class StubHub:
+    """Hub whose confirmations are resolved by the test."""
+
+    manufacturer = "Linkedgo"
+    online = True
+
+    def __init__(self) -> None:
+        self.ptp = PTP()
+        # (entity, expected) of every confirmation
+        self.confirmations: list[tuple] = []
+        self.outcomes: list[asyncio.Future] = []
+
+    async def async_device_control(self, entity, service, value) -> bool:
+        return True
+
+    def reported_value(self, entity, service, field, value):
+        return self.ptp.reported_value(entity, service, field, value)
+
+    async def async_confirm_control(self, entity, expected) -> bool:
+        self.confirmations.append((entity, expected))
+        outcome = asyncio.get_running_loop().create_future()
+        self.outcomes.append(outcome)
+        return await outcome
+
+
+def _entity() -> DeviceEntity:
+    return DeviceEntity(
+        product_id=PID_ST2000,
+        product_model="ST2000",
+        ha_type="climate",
+        ha_supported_features=0,
+        device_id=100000,
+        device_mac="02:00:00:01:86:a0",
+        device_name="thermostat ST2000",
+        sw_version=3,
+        online=True,
+        properties=ST2000.decode(RAW_STATE),
+        raw_data=dict(RAW_STATE),
+        capabilities=ST2000.descriptor(RAW_STATE),
+    )
+
+
+@pytest.fixture
+def thermostat(hass):
+    """Thermostat counting its state writes instead of writing them."""
+    thermostat = MyThermostat(StubCoordinator(hass), StubHub(), _entity())
+    thermostat.hass = hass
+    thermostat.writes = 0
+
+    def write_state():
+        thermostat.writes += 1
+
+    thermostat.async_write_ha_state = write_state
+    thermostat._written_state = thermostat._visible_state()
+    yield thermostat
+    for task in thermostat._confirm_tasks.values():
+        task.cancel()
+
+
+async def _async_settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_unconfirmed_value_rolls_back(thermostat, caplog):
+    hub = thermostat.hub
+    await thermostat.async_set_temperature(temperature=22.5)
+    assert thermostat.target_temperature == 22.5
+
+    hub.outcomes[0].set_result(False)
+    await _async_settle()
+
+    assert thermostat.target_temperature == 20.0
+    assert not thermostat._optimistic and not thermostat._confirm_tasks
+    assert thermostat.writes == 2
+    assert "rolled back" in caplog.text
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+
+
+async def test_failed_confirmation_drops_optimistic_value(thermostat):
+    hub = thermostat.hub
+    await thermostat.async_set_temperature(temperature=22.5)
+
+    hub.outcomes[0].set_exception(RuntimeError("circuit open"))
+    await _async_settle()
+
+    assert thermostat.target_temperature == 20.0
+    assert not thermostat._optimistic and not thermostat._confirm_tasks
+
+
+async def test_newer_command_keeps_its_optimistic_value(thermostat):
+    hub = thermostat.hub
+    await thermostat.async_set_temperature(temperature=22.5)
+    await _async_settle()
+    await thermostat.async_set_temperature(temperature=23.0)
+    await _async_settle()
+
+    assert hub.outcomes[0].cancelled()
+    assert thermostat.target_temperature == 23.0
+    assert list(thermostat._optimistic.values()) == [23.0]
+
+    hub.outcomes[1].set_result(True)
+    await _async_settle()
+    assert not thermostat._optimistic and not thermostat._confirm_tasks
+
+
+async def test_lossy_mapping_confirms_reported_value(thermostat):
+    hub = thermostat.hub
+
+    # Direct fan machine types write FAN_HIGH as the raw value of medium.
+    await thermostat.async_set_fan_mode(FAN_HIGH)
+    await _async_settle()
+
+    assert thermostat.fan_mode == FAN_MEDIUM
+    assert hub.confirmations[0][1] == {ATTR_FAN_MODE: FAN_MEDIUM}
+
+
+async def test_reported_value_decodes_written_datapoints():
+    ptp = PTP()
+    entity = _entity()
+
+    assert (
+        ptp.reported_value(entity, SERVICE_SET_FAN_MODE, ATTR_FAN_MODE, FAN_HIGH)
+        == FAN_MEDIUM
+    )
+    assert (
+        ptp.reported_value(
+            entity, SERVICE_SET_TEMPERATURE, SERVICE_SET_TEMPERATURE, 21.5
+        )
+        == 21.5
+    )
+    # Values the model can not encode are returned as they are.
+    assert (
+        ptp.reported_value(
+            entity, SERVICE_SET_TEMPERATURE, SERVICE_SET_TEMPERATURE, 99
+        )
+        == 99
+    )
+
+
+def _poll(thermostat, raw_state: dict):
+    """Merge a polled raw state into the entity and notify the thermostat."""
+    entity = thermostat.entity
+    entity.properties.update(ST2000.decode(raw_state))
+    entity.raw_data = raw_state
+    entity.capabilities = ST2000.descriptor(raw_state)
+    thermostat._handle_coordinator_update()
+
+
+async def test_unchanged_poll_writes_no_state(thermostat):
+    _poll(thermostat, dict(RAW_STATE))
+    _poll(thermostat, dict(RAW_STATE))
+
+    assert thermostat.writes == 0
+
+
+async def test_changed_reading_writes_state_once(thermostat):
+    _poll(thermostat, {**RAW_STATE, "116": 215})
+    _poll(thermostat, {**RAW_STATE, "116": 215})
+
+    assert thermostat.current_temperature == 21.5
+    assert thermostat.writes == 1
+
+
+async def test_changed_capabilities_write_state(thermostat):
+    # Alternating fan machine type, other fan modes, same properties otherwise.
+    _poll(thermostat, {**RAW_STATE, "2": 0, "6": 2})
+
+    assert thermostat.fan_modes == (FAN_AUTO, FAN_LOW, FAN_MEDIUM, FAN_HIGH)
+    assert thermostat.writes == 1
+
+
+async def test_availability_change_writes_state(thermostat):
+    thermostat.hub.online = False
+    thermostat._handle_coordinator_update()
+    thermostat._handle_coordinator_update()
+    assert thermostat.writes == 1
+
+    thermostat.hub.online = True
+    thermostat._handle_coordinator_update()
+    assert thermostat.writes == 2
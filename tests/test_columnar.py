@@ -0,0 +1,158 @@
+"""Columnar decode of whole product groups against the scalar decoder."""
+
+import importlib
+import random
+
+import pytest
+
+from custom_components.linkedgo_bridge.physical_model import ST830, ST2000
+from custom_components.linkedgo_bridge.physical_model.columnar import (
+    compile_columnar_decoder,
+)
+from xlink_server import build_fleet
+
+pytest.importorskip("numpy")
+
+ST1800_HN = importlib.import_module(
+    "custom_components.linkedgo_bridge.physical_model.ST1800-HN"
+).ST830
+
+MODELS = (ST2000, ST830, ST1800_HN)
+
+# build_fleet arguments of a product group of each model
+FLEETS = {
+    ST2000: {"st2000": 300},
+    ST830: {"st830": 300},
+    ST1800_HN: {"st1800": 300},
+}
+
+# values the columns can not hold exactly, their rows are decoded scalar
+IRREGULAR_VALUES = (2**53, -(2**53), 2.5, 1.0, True, "1")
+
+
+def _fleet_states(model) -> list[dict]:
+    return [device.state for device in build_fleet(**FLEETS[model])]
+
+
+def _irregular_states(model, seed: int = 0) -> list[dict]:
+    """Fleet states with datapoints dropped or replaced, scalar decodable."""
+    rng = random.Random(seed)
+    states = []
+    for state in _fleet_states(model):
+        state = dict(state)
+        for index in list(state):
+            roll = rng.random()
+            if roll < 0.1:
+                del state[index]
+            elif roll < 0.2:
+                state[index] = rng.choice(IRREGULAR_VALUES)
+        try:
+            model.decode(state)
+        except Exception:
+            continue
+        states.append(state)
+    return states
+
+
+class CountingDecoder:
+    """Scalar decoder of a model counting the rows it decodes."""
+
+    def __init__(self, model) -> None:
+        self.decode = model.decode
+        self.rows = 0
+
+    def __call__(self, state: dict) -> dict:
+        self.rows += 1
+        return self.decode(state)
+
+
+def _mixed_states(model) -> list[dict]:
+    """Fleet states, every third one with a non int datapoint."""
+    states = _fleet_states(model)[:90]
+    for position in range(0, len(states), 3):
+        states[position] = {**states[position], _first_index(model): 2.5}
+    return states
+
+
+def _first_index(model) -> str:
+    return min(
+        spec.index
+        for spec in model.datapoints.values()
+        if getattr(spec, "index", None) is not None
+    )
+
+
+def _scalar_rows(model, states: list[dict]) -> int:
+    """Rows the columns can not decode, a non int value or a field without value."""
+    return sum(
+        1
+        for state in states
+        if state[_first_index(model)] == 2.5
+        or len(model.decode(state)) < len(model.datapoints)
+    )
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.model)
+def test_regular_rows_are_decoded_column_wise(model):
+    states = _fleet_states(model)
+    scalar = CountingDecoder(model)
+    decode_columns = compile_columnar_decoder(model.datapoints, scalar)
+
+    assert decode_columns(states) == [model.decode(state) for state in states]
+    assert scalar.rows == _scalar_rows(model, states) < len(states) / 10
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.model)
+def test_mixed_batch_falls_back_per_irregular_row(model):
+    states = _mixed_states(model)
+    scalar = CountingDecoder(model)
+    decode_columns = compile_columnar_decoder(model.datapoints, scalar)
+
+    assert decode_columns(states) == [model.decode(state) for state in states]
+    assert scalar.rows == _scalar_rows(model, states)
+    assert scalar.rows >= len(states) // 3
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.model)
+def test_regular_states_decode_like_scalar(model):
+    states = _fleet_states(model)
+
+    assert model.decode_columns(states) == [model.decode(state) for state in states]
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.model)
+def test_irregular_states_decode_like_scalar(model):
+    states = _irregular_states(model)
+
+    assert model.decode_columns(states) == [model.decode(state) for state in states]
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.model)
+def test_int64_overflow_decodes_like_scalar(model):
+    states = _fleet_states(model)[:10]
+    states[3] = {**states[3], "0": 2**70}
+
+    assert model.decode_columns(states) == [model.decode(state) for state in states]
+
+
+def test_empty_group_decodes_to_nothing():
+    assert ST2000.decode_columns([]) == []
+
+
+@pytest.mark.asyncio
+async def test_ptp_columnar_poll_matches_scalar(ptp, stub_server):
+    pid_to_devices = {}
+    for device in stub_server.devices.values():
+        pid_to_devices.setdefault(device.product_id, []).append(device.device_id)
+
+    scalar, failed = await ptp.async_batch_device_state(
+        pid_to_devices, only_changed=False
+    )
+    ptp.columnar_decode_min_devices = 1
+    columnar, _ = await ptp.async_batch_device_state(
+        pid_to_devices, only_changed=False
+    )
+
+    assert not failed
+    assert len(scalar) == len(stub_server.devices)
+    assert columnar == scalar
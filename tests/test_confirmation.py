@@ -0,0 +1,128 @@
+"""Coalesced confirmation of control commands."""
+
+import asyncio
+
+import pytest
+
+from custom_components.linkedgo_bridge.confirmation import ConfirmationQueue
+from custom_components.linkedgo_bridge.const import DeviceEntity
+from xlink_server import PID_ST830, PID_ST2000
+
+pytestmark = pytest.mark.asyncio
+
+FIELD = "service_set_temperature"
+
+
+def _entity(device_id: int, product_id: str = PID_ST2000) -> DeviceEntity:
+    return DeviceEntity(
+        product_id=product_id,
+        product_model="ST2000",
+        ha_type="climate",
+        ha_supported_features=0,
+        device_id=device_id,
+        device_mac="02:00:00:00:00:00",
+        device_name=f"thermostat {device_id}",
+        sw_version=3,
+        online=True,
+        properties={FIELD: 20.0},
+        raw_data={},
+    )
+
+
+class FakeDevices:
+    """Query of a ConfirmationQueue, devices apply writes after some queries."""
+
+    def __init__(self, entities: list[DeviceEntity], applied_after: int) -> None:
+        self.entities = {entity.device_id: entity for entity in entities}
+        # {device_id: value} the devices report from query 'applied_after' on
+        self.written: dict = {}
+        self.applied_after = applied_after
+        self.queries: list[dict] = []
+        self.failing = 0
+
+    async def __call__(self, pid_to_devices: dict[str, list]) -> dict | None:
+        self.queries.append(pid_to_devices)
+        if self.failing:
+            self.failing -= 1
+            return None
+        if len(self.queries) < self.applied_after:
+            return {}
+        for devices in pid_to_devices.values():
+            for device_id in devices:
+                if device_id in self.written:
+                    self.entities[device_id].properties = {
+                        FIELD: self.written[device_id]
+                    }
+        return {}
+
+
+def _queue(devices: FakeDevices) -> ConfirmationQueue:
+    queue = ConfirmationQueue(devices)
+    queue.backoff = (0.01, 0.02, 0.04)
+    queue.coalesce_window = 0.01
+    return queue
+
+
+async def test_unreported_value_is_not_confirmed():
+    entity = _entity(1)
+    devices = FakeDevices([entity], applied_after=10)
+    queue = _queue(devices)
+
+    assert not await queue.async_confirm(entity, {FIELD: 22.5})
+    assert queue.queries == len(queue.backoff)
+    assert len(queue) == 0
+    assert entity.properties[FIELD] == 20.0
+
+
+async def test_reported_value_is_confirmed():
+    entity = _entity(1)
+    devices = FakeDevices([entity], applied_after=2)
+    devices.written[1] = 22.5
+    queue = _queue(devices)
+
+    assert await queue.async_confirm(entity, {FIELD: 22.5})
+    assert queue.queries == 2
+    assert len(queue) == 0
+
+
+async def test_failed_query_is_retried():
+    entity = _entity(1)
+    devices = FakeDevices([entity], applied_after=1)
+    devices.written[1] = 22.5
+    devices.failing = 1
+    queue = _queue(devices)
+
+    assert await queue.async_confirm(entity, {FIELD: 22.5})
+    assert queue.queries == 2
+
+
+async def test_concurrent_confirmations_share_queries():
+    entities = [_entity(1), _entity(2), _entity(3, PID_ST830)]
+    devices = FakeDevices(entities, applied_after=1)
+    devices.written.update({1: 22.5, 2: 22.5})
+    queue = _queue(devices)
+
+    confirmed = await asyncio.gather(
+        queue.async_confirm(entities[0], {FIELD: 22.5}),
+        queue.async_confirm(entities[0], {FIELD: 22.5}),
+        queue.async_confirm(entities[1], {FIELD: 22.5}),
+        queue.async_confirm(entities[2], {FIELD: 22.5}),
+    )
+
+    # The device that never reports 22.5 is queried once per attempt.
+    assert confirmed == [True, True, True, False]
+    assert devices.queries[0] == {PID_ST2000: [1, 2], PID_ST830: [3]}
+    assert devices.queries[1:] == [{PID_ST830: [3]}] * (len(queue.backoff) - 1)
+
+
+async def test_close_reports_pending_as_not_confirmed():
+    entity = _entity(1)
+    queue = _queue(FakeDevices([entity], applied_after=10))
+    queue.backoff = (10.0,)
+    confirmation = asyncio.ensure_future(queue.async_confirm(entity, {FIELD: 22.5}))
+    await asyncio.sleep(0)
+
+    await queue.async_close()
+
+    assert not await confirmation
+    assert queue.queries == 0
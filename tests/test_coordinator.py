@@ -0,0 +1,182 @@
+"""Due product groups and listener notification of MyCoordinator."""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from custom_components.linkedgo_bridge.const import DeviceEntity
+from custom_components.linkedgo_bridge.coordinator import MyCoordinator
+from custom_components.linkedgo_bridge.device_table import DeviceTable
+from custom_components.linkedgo_bridge.xlink_ptp import APIREQUESTError, PTPFields
+
+pytestmark = pytest.mark.asyncio
+
+AIR = "air"
+FLOOR = "floor"
+
+# seconds between polls of the floor heating group
+FLOOR_POLL_INTERVAL = 600
+
+
+def _entity(device_id: int, product_id: str) -> DeviceEntity:
+    return DeviceEntity(
+        product_id=product_id,
+        product_model=product_id,
+        ha_type="climate",
+        ha_supported_features=0,
+        device_id=device_id,
+        device_mac="02:00:00:00:00:00",
+        device_name=f"thermostat {device_id}",
+        sw_version=3,
+        online=True,
+        properties={},
+        raw_data={},
+    )
+
+
+def _state(temperature: float) -> dict:
+    return {
+        "properties": {"current_temperature": temperature},
+        "raw_data": {},
+        "capabilities": {},
+    }
+
+
+class StubHub:
+    """Hub answering polls with the states and failures set by the test."""
+
+    online = True
+
+    def __init__(self) -> None:
+        self.devices = [_entity(1, AIR), _entity(2, FLOOR)]
+        # product ids of every poll
+        self.polls: list[list[str]] = []
+        # result of the next poll, then polls change nothing
+        self.states: dict = {}
+        self.failed: set[str] = set()
+        self.error: Exception | None = None
+
+    async def async_get_all_device(self, home_id) -> DeviceTable:
+        return DeviceTable(self.devices)
+
+    async def async_get_all_device_states(self, product_ids):
+        self.polls.append(sorted(product_ids))
+        if self.error is not None:
+            raise self.error
+        states, self.states = self.states, {}
+        return states, self.failed & set(product_ids)
+
+    def product_poll_interval(self, pid) -> float:
+        return FLOOR_POLL_INTERVAL if pid == FLOOR else 0
+
+
+@pytest_asyncio.fixture
+async def coordinator(hass):
+    config_entry = SimpleNamespace(
+        data={PTPFields.HOME_ID: 1}, options={}, unique_id="1"
+    )
+    coordinator = MyCoordinator(hass, config_entry, StubHub())
+    await coordinator.async_refresh()
+    yield coordinator
+    await coordinator.async_shutdown()
+
+
+@pytest.fixture
+def notified(coordinator) -> list:
+    """Calls of a listener of the coordinator."""
+    calls = []
+    coordinator.async_add_listener(lambda: calls.append(coordinator.data))
+    return calls
+
+
+async def test_group_is_due_within_half_a_tick(coordinator):
+    hub = coordinator.hub
+    assert hub.polls == [[AIR, FLOOR]]
+
+    await coordinator.async_refresh()
+    assert hub.polls[-1] == [AIR]
+
+    coordinator.update_interval = timedelta(seconds=60)
+    # 35s before the floor group is due, later than half a tick
+    coordinator._polled_at[FLOOR] -= FLOOR_POLL_INTERVAL - 35
+    await coordinator.async_refresh()
+    assert hub.polls[-1] == [AIR]
+
+    # 25s before, the poll closest to the interval is this one
+    coordinator._polled_at[FLOOR] -= 10
+    await coordinator.async_refresh()
+    assert hub.polls[-1] == [AIR, FLOOR]
+
+
+async def test_failed_group_stays_due_and_keeps_its_state(coordinator):
+    hub = coordinator.hub
+    hub.states = {"1": _state(20.5), "2": _state(30.0)}
+    await coordinator.async_refresh()
+
+    coordinator._polled_at[FLOOR] -= FLOOR_POLL_INTERVAL
+    hub.failed = {FLOOR}
+    hub.states = {"1": _state(21.0)}
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data.get(1).properties["current_temperature"] == 21.0
+    assert coordinator.data.get(2).properties["current_temperature"] == 30.0
+    # The retry interval is not decayed.
+    assert coordinator.update_interval == timedelta(seconds=60)
+
+    hub.failed = set()
+    await coordinator.async_refresh()
+    assert hub.polls[-1] == [AIR, FLOOR]
+
+
+async def test_every_due_group_failing_fails_the_update(coordinator):
+    coordinator.hub.failed = {AIR}
+
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+
+
+async def test_listeners_follow_success_and_changes(coordinator, notified):
+    hub = coordinator.hub
+
+    hub.states = {"1": _state(20.5)}
+    await coordinator.async_refresh()
+    assert len(notified) == 1
+
+    # Nothing changed, nothing to show.
+    await coordinator.async_refresh()
+    assert len(notified) == 1
+
+    hub.error = APIREQUESTError("cloud down")
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert len(notified) == 2
+
+    # Recovering shows the entities available again, changed or not.
+    hub.error = None
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert len(notified) == 3
+
+    await coordinator.async_refresh()
+    assert len(notified) == 3
+
+
+async def test_online_flip_notifies_listeners(coordinator, notified):
+    hub = coordinator.hub
+    await coordinator.async_refresh()
+    assert len(notified) == 0
+
+    hub.online = False
+    await coordinator.async_refresh()
+    assert len(notified) == 1
+
+    await coordinator.async_refresh()
+    assert len(notified) == 1
+
+    hub.online = True
+    await coordinator.async_refresh()
+    assert len(notified) == 2
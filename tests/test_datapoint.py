@@ -0,0 +1,98 @@
+"""Compiled datapoint decoders against the per-field decoders they replaced."""
+
+import importlib
+import random
+
+import pytest
+
+import baseline_decoders
+from custom_components.linkedgo_bridge.physical_model import ST830, ST2000
+from xlink_server import PID_ST1800_HN, PID_ST2000, PID_ST830, build_fleet
+
+ST1800_HN = importlib.import_module(
+    "custom_components.linkedgo_bridge.physical_model.ST1800-HN"
+).ST830
+
+# (model, baseline decoders, datapoint indices read by the model)
+MODELS = {
+    PID_ST2000: (
+        ST2000,
+        baseline_decoders.AirUnit,
+        ("0", "1", "2", "3", "4", "6", "7", "8", "116", "117", "130"),
+    ),
+    PID_ST830: (
+        ST830,
+        baseline_decoders.AirUnit,
+        ("0", "1", "2", "3", "4", "6", "7", "8", "116", "117", "130"),
+    ),
+    PID_ST1800_HN: (
+        ST1800_HN,
+        baseline_decoders.FloorHeating,
+        ("0", "1", "20", "21", "23"),
+    ),
+}
+
+# raw values covering every table entry, the standby bits and the values
+# the devices are not expected to report
+VALUES = (
+    0, 1, 2, 3, 4, 5, 6, 7, 15, 18, 80, 82, 0x40, 0x80, 0xC0, -1, 2**60,
+    1.0, 2.5, True, False, "1", "3", None,
+)  # fmt: skip
+
+
+def _baseline(baseline, state: dict):
+    try:
+        return baseline_decoders.decode(baseline, state)
+    except Exception as err:
+        return type(err)
+
+
+def _compiled(model, state: dict):
+    try:
+        properties = model.decode(state)
+    except Exception as err:
+        return type(err)
+    capabilities = {
+        field: list(value) if isinstance(value, tuple) else value
+        for field, value in model.descriptor(state).items()
+    }
+    return {**properties, **capabilities}
+
+
+def _random_states(indices, count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {index: rng.choice(VALUES) for index in indices if rng.random() < 0.8}
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("pid", MODELS)
+def test_fields_match_baseline(pid):
+    model, baseline, _ = MODELS[pid]
+
+    assert set(model.datapoints) | set(model.capabilities) == set(
+        baseline.attributes
+    )
+    assert not set(model.datapoints) & set(model.capabilities)
+
+
+@pytest.mark.parametrize("pid", MODELS)
+def test_fleet_states_decode_like_baseline(pid):
+    model, baseline, _ = MODELS[pid]
+    devices = [
+        device
+        for device in build_fleet(st2000=50, st830=50, st1800=50)
+        if device.product_id == pid
+    ]
+
+    for state in [{}] + [device.state for device in devices]:
+        assert _compiled(model, state) == _baseline(baseline, state), state
+
+
+@pytest.mark.parametrize("pid", MODELS)
+def test_random_states_decode_like_baseline(pid):
+    model, baseline, indices = MODELS[pid]
+
+    for state in _random_states(indices, 5000):
+        assert _compiled(model, state) == _baseline(baseline, state), state
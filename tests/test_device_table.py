@@ -0,0 +1,70 @@
+"""Product index of the DeviceTable."""
+
+from custom_components.linkedgo_bridge.const import DeviceEntity
+from custom_components.linkedgo_bridge.device_table import DeviceTable
+
+AIR = "air"
+FLOOR = "floor"
+
+
+def _entity(device_id, product_id: str = AIR) -> DeviceEntity:
+    return DeviceEntity(
+        product_id=product_id,
+        product_model=product_id,
+        ha_type="climate",
+        ha_supported_features=0,
+        device_id=device_id,
+        device_mac="02:00:00:00:00:00",
+        device_name=f"thermostat {device_id}",
+        sw_version=3,
+        online=True,
+        properties={},
+        raw_data={},
+    )
+
+
+def _index_of_entities(table: DeviceTable) -> dict[str, list]:
+    index = {}
+    for entity in table:
+        index.setdefault(entity.product_id, []).append(entity.device_id)
+    return index
+
+
+def test_devices_are_indexed_by_product():
+    table = DeviceTable([_entity(1), _entity(2, FLOOR), _entity(3)])
+
+    assert table.by_product == {AIR: [1, 3], FLOOR: [2]}
+    assert len(table) == 3
+
+
+def test_remove_keeps_the_index_consistent():
+    table = DeviceTable([_entity(1), _entity(2, FLOOR), _entity(3)])
+
+    assert table.remove("2").device_id == 2
+    assert table.remove(2) is None
+    table.remove(1)
+
+    assert table.by_product == {AIR: [3]}
+    assert table.by_product == _index_of_entities(table)
+    assert 1 not in table and "3" in table
+
+
+def test_add_of_a_known_id_moves_it_to_its_new_product():
+    table = DeviceTable([_entity(1), _entity(2)])
+
+    table.add(_entity("1", FLOOR))
+
+    assert table.by_product == {AIR: [2], FLOOR: ["1"]}
+    assert table.by_product == _index_of_entities(table)
+    assert len(table) == 2
+
+
+def test_replace_rebuilds_the_index():
+    table = DeviceTable([_entity(1), _entity(2, FLOOR)])
+    index = table.by_product
+
+    table.replace([_entity(3, FLOOR), _entity(4, FLOOR)])
+
+    # The index is live, holders of it see the new groups.
+    assert index == {FLOOR: [3, 4]}
+    assert table.get(1) is None and table.get("3").device_id == 3
@@ -0,0 +1,33 @@
+"""Device table and polled states of the Hub against the stub cloud."""
+
+import pytest
+
+from custom_components.linkedgo_bridge.hub import Hub
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_removed_device_is_decoded_when_added_again(hass, ptp, stub_server):
+    hub = Hub(hass, ptp)
+    await hub.async_get_all_device(stub_server.home_id)
+    states, _ = await hub.async_get_all_device_states()
+    device_id = next(iter(states))
+
+    assert hub.remove_device(int(device_id)).device_id == int(device_id)
+    assert device_id not in hub.devices
+    assert device_id not in ptp._polled_states
+    states, _ = await hub.async_get_all_device_states()
+    assert states == {}
+
+    # A downloaded device list decodes every device, added ones start empty.
+    await hub.async_get_all_device(stub_server.home_id)
+    states, _ = await hub.async_get_all_device_states()
+    assert set(states) == set(map(str, stub_server.devices))
+    assert hub.devices.merge(states) == len(stub_server.devices)
+    assert hub.devices.get(device_id).properties == states[device_id]["properties"]
+
+
+async def test_unknown_device_is_not_removed(hass, ptp):
+    hub = Hub(hass, ptp)
+
+    assert hub.remove_device(1) is None
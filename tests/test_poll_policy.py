@@ -0,0 +1,86 @@
+"""Poll intervals chosen by AdaptivePollPolicy."""
+
+import pytest
+
+from custom_components.linkedgo_bridge.poll_policy import AdaptivePollPolicy
+
+NOON = 12
+
+
+def _steady_intervals(policy: AdaptivePollPolicy, polls: int) -> list[float]:
+    """Intervals of 'polls' unchanged daytime polls of a busy home."""
+    return [
+        policy.next_interval(1000.0, NOON, changed=False, all_idle=False)
+        for _ in range(polls)
+    ]
+
+
+def test_unchanged_polls_decay_to_max_interval():
+    policy = AdaptivePollPolicy(60)
+
+    assert _steady_intervals(policy, 6) == [90.0, 135.0, 202.5, 300, 300, 300]
+
+
+def test_changed_poll_resets_the_decay():
+    policy = AdaptivePollPolicy(60)
+    _steady_intervals(policy, 3)
+
+    assert policy.next_interval(1000.0, NOON, changed=True, all_idle=False) == 60.0
+    assert _steady_intervals(policy, 1) == [90.0]
+
+
+def test_max_interval_is_at_least_the_base_interval():
+    policy = AdaptivePollPolicy(600)
+
+    assert policy.max_interval == 600
+    assert _steady_intervals(policy, 2) == [600, 600]
+
+
+@pytest.mark.parametrize(
+    ("hour", "night"),
+    [(22, False), (23, True), (0, True), (5, True), (6, False), (NOON, False)],
+)
+def test_night_window_wraps_past_midnight(hour, night):
+    policy = AdaptivePollPolicy(60)
+
+    assert policy.is_night(hour) is night
+
+
+def test_night_window_within_a_day():
+    policy = AdaptivePollPolicy(60)
+    policy.night_start, policy.night_end = 1, 5
+
+    assert [policy.is_night(hour) for hour in (0, 1, 4, 5)] == [
+        False,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_night_and_idle_stretch_the_interval():
+    policy = AdaptivePollPolicy(60)
+
+    assert policy.next_interval(1000.0, 2, changed=True, all_idle=True) == 240.0
+    assert policy.next_interval(1000.0, NOON, changed=True, all_idle=True) == 120.0
+
+
+def test_activity_polls_fast_for_fast_period():
+    policy = AdaptivePollPolicy(60)
+    policy.note_activity(1000.0)
+
+    # Fast polls ignore the night and idle factors.
+    assert policy.next_interval(1100.0, 2, changed=False, all_idle=True) == 10.0
+    assert not policy.is_fast(1120.0)
+    assert policy.next_interval(1120.0, NOON, changed=False, all_idle=False) == 135.0
+
+
+def test_retry_interval_restarts_from_base():
+    policy = AdaptivePollPolicy(60)
+    _steady_intervals(policy, 5)
+
+    assert policy.retry_interval(1000.0) == 60.0
+    assert _steady_intervals(policy, 1) == [90.0]
+
+    policy.note_activity(1000.0)
+    assert policy.retry_interval(1050.0) == 10.0
@@ -0,0 +1,60 @@
+"""Single-flight token refresh against the stub cloud."""
+
+import asyncio
+
+import pytest
+
+from xlink_server import PID_ST2000
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_403s_refresh_once(ptp, stub_server):
+    api = ptp.api
+    stub_server.expire_tokens()
+
+    results = await asyncio.gather(
+        *(
+            api.async_batch_query_vdevice(PID_ST2000, list(stub_server.devices))
+            for _ in range(5)
+        )
+    )
+
+    assert [code for code, _ in results] == [200] * 5
+    assert stub_server.request_count("/token/refresh") == 1
+    assert api.access_token == stub_server.access_token
+
+
+async def test_refresh_of_replaced_token_sends_nothing(ptp, stub_server):
+    stale_token = ptp.api.access_token
+    assert await ptp.api.auth.async_refresh()
+
+    assert await ptp.api.auth.async_refresh(stale_token=stale_token)
+    assert stub_server.request_count("/token/refresh") == 1
+
+
+async def test_expired_refresh_token_logs_in_again(ptp, stub_server):
+    api = ptp.api
+    stub_server.expire_tokens()
+    stub_server.refresh_token = None
+
+    code, _ = await api.async_batch_query_vdevice(
+        PID_ST2000, list(stub_server.devices)
+    )
+
+    assert code == 200
+    assert stub_server.request_count("/token/refresh") == 1
+    assert stub_server.request_count("/user_auth") == 2
+
+
+async def test_stop_cancels_refresh_in_flight(ptp, stub_server):
+    auth = ptp.api.auth
+    stub_server.faults.latency = 1.0
+    refresh = asyncio.ensure_future(auth.async_refresh())
+    await asyncio.sleep(0.1)
+
+    auth.stop()
+
+    with pytest.raises(asyncio.CancelledError):
+        await refresh
+    assert auth._task is None
@@ -0,0 +1,72 @@
+"""Metadata cache of the Xlink client against the stub cloud."""
+
+import pytest
+
+from custom_components.linkedgo_bridge.xlink_api import XlinkEndpoint
+
+pytestmark = pytest.mark.asyncio
+
+
+def _home_devices_requests(stub_server) -> int:
+    return stub_server.request_count(f"/home/{stub_server.home_id}/devices")
+
+
+async def test_fresh_entry_is_served_from_memory(ptp, stub_server):
+    first = await ptp.api.async_home_devices(stub_server.home_id)
+    second = await ptp.api.async_home_devices(stub_server.home_id)
+
+    assert first == second and first[0] == 200
+    assert _home_devices_requests(stub_server) == 1
+    assert ptp.api.metadata_cache.as_dict()["hits"] == 1
+
+
+async def test_expired_entry_is_revalidated(ptp, stub_server):
+    cache = ptp.api.metadata_cache
+    code, body = await ptp.api.async_home_devices(stub_server.home_id)
+    (entry,) = cache.entries.values()
+    assert entry.etag
+
+    cache.ttl = 0
+    assert await ptp.api.async_home_devices(stub_server.home_id) == (200, body)
+
+    assert _home_devices_requests(stub_server) == 2
+    assert cache.revalidations == 1
+    assert cache.misses == 1
+    # A 304 is no failure of the endpoint.
+    metrics = ptp.api.metrics.as_dict()[XlinkEndpoint.HOME_DEVICES]
+    assert metrics["statuses"] == {"200": 1, "304": 1}
+    assert ptp.online
+
+
+async def test_changed_metadata_replaces_the_entry(ptp, stub_server):
+    cache = ptp.api.metadata_cache
+    _, before = await ptp.api.async_home_devices(stub_server.home_id)
+    stub_server.devices.pop(next(iter(stub_server.devices)))
+
+    cache.ttl = 0
+    _, after = await ptp.api.async_home_devices(stub_server.home_id)
+
+    assert len(after["list"]) == len(before["list"]) - 1
+    assert cache.misses == 2 and cache.revalidations == 0
+
+
+async def test_invalidated_entry_is_downloaded(ptp, stub_server):
+    await ptp.api.async_home_devices(stub_server.home_id)
+
+    ptp.invalidate_metadata()
+    assert not ptp.api.metadata_cache.entries
+    await ptp.api.async_home_devices(stub_server.home_id)
+
+    assert _home_devices_requests(stub_server) == 2
+    assert ptp.api.metadata_cache.misses == 2
+
+
+async def test_invalidate_drops_one_entry(ptp, stub_server):
+    cache = ptp.api.metadata_cache
+    await ptp.api.async_user_home(ptp.api.user_id)
+    await ptp.api.async_home_devices(stub_server.home_id)
+    homes_url, devices_url = cache.entries
+
+    cache.invalidate(devices_url)
+
+    assert list(cache.entries) == [homes_url]
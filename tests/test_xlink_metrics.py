@@ -0,0 +1,53 @@
+"""Percentiles of the latency histogram."""
+
+import pytest
+
+from custom_components.linkedgo_bridge.xlink_metrics import LatencyHistogram
+
+
+def _histogram(*samples_ms: float) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for ms in samples_ms:
+        histogram.record(ms / 1000)
+    return histogram
+
+
+def test_empty_histogram_has_no_percentiles():
+    assert _histogram().as_dict() == {
+        "count": 0,
+        "mean_ms": None,
+        "max_ms": 0.0,
+        "p50_ms": None,
+        "p95_ms": None,
+        "p99_ms": None,
+    }
+
+
+def test_percentiles_interpolate_inside_their_bucket():
+    histogram = _histogram(*[0.5] * 50, *[24] * 50)
+
+    # 50 samples in [0, 1], 50 in (10, 25]
+    assert histogram.percentile(0.5) == 1.0
+    assert histogram.percentile(0.95) == 23.5
+    assert histogram.as_dict()["mean_ms"] == 12.25
+
+
+def test_percentiles_are_capped_at_the_max_sample():
+    histogram = _histogram(*[0.5] * 50, *[24] * 50)
+
+    assert histogram.percentile(0.99) == 24.0
+    assert histogram.percentile(1.0) == 24.0
+
+
+def test_bucket_bounds_are_inclusive():
+    histogram = _histogram(1, 2.5)
+
+    assert histogram.counts[:3] == [1, 1, 0]
+
+
+@pytest.mark.parametrize("quantile", [0.5, 0.99])
+def test_open_bucket_interpolates_up_to_the_max(quantile):
+    histogram = _histogram(40000, 60000)
+
+    assert histogram.counts[-1] == 2
+    assert 30000 < histogram.percentile(quantile) <= 60000
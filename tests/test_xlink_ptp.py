@@ -0,0 +1,206 @@
+"""PTP polls and control commands against the stub cloud."""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from homeassistant.components.climate import (
+    PRESET_SLEEP,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_PRESET_MODE,
+    SERVICE_SET_TEMPERATURE,
+)
+
+from custom_components.linkedgo_bridge.xlink_api import XlinkEndpoint
+from custom_components.linkedgo_bridge.xlink_ptp import PTP
+from custom_components.linkedgo_bridge.xlink_retry import RetryPolicy
+from conftest import PASSWORD, USERNAME
+from xlink_server import PID_ST830, PID_ST2000, XlinkStubServer, build_fleet
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def entities(ptp, stub_server):
+    """Device entities of the ST2000 air units of the stub cloud."""
+    devices = await ptp.async_home_device(stub_server.home_id)
+    return [entity for entity in devices if entity.product_id == PID_ST2000]
+
+
+def _by_product(stub_server) -> dict[str, list]:
+    pid_to_devices = {}
+    for device in stub_server.devices.values():
+        pid_to_devices.setdefault(device.product_id, []).append(device.device_id)
+    return pid_to_devices
+
+
+def _device_ids(stub_server, pid: str) -> set[str]:
+    return {
+        str(device.device_id)
+        for device in stub_server.devices.values()
+        if device.product_id == pid
+    }
+
+
+async def test_failed_group_keeps_answered_groups(ptp, stub_server):
+    ptp.api.endpoint_retry_policies = {XlinkEndpoint.V_DEVICES: RetryPolicy(1)}
+    stub_server.faults.failing_products.add(PID_ST830)
+
+    states, failed = await ptp.async_batch_device_state(_by_product(stub_server))
+
+    assert failed == {PID_ST830}
+    assert set(states) == _device_ids(stub_server, PID_ST2000)
+    assert set(ptp._polled_states) == _device_ids(stub_server, PID_ST2000)
+
+    stub_server.faults.failing_products.clear()
+    states, failed = await ptp.async_batch_device_state(_by_product(stub_server))
+
+    # Unchanged answered devices are skipped, the failed ones are decoded.
+    assert not failed
+    assert set(states) == _device_ids(stub_server, PID_ST830)
+
+
+async def test_concurrent_controls_share_one_write(ptp, stub_server, entities):
+    entity = entities[0]
+
+    results = await asyncio.gather(
+        ptp.async_device_control(entity, SERVICE_SET_TEMPERATURE, 21.5),
+        ptp.async_device_control(entity, SERVICE_SET_HUMIDITY, 55),
+        ptp.async_device_control(entity, SERVICE_SET_PRESET_MODE, PRESET_SLEEP),
+    )
+
+    assert results == [True, True, True]
+    assert stub_server.commands == [
+        (
+            entity.device_id,
+            [
+                {"index": 7, "value": 215.0},
+                {"index": 8, "value": 55},
+                {"index": 4, "value": 1},
+            ],
+        )
+    ]
+    assert stub_server.request_count(f"/device/set/{entity.device_id}") == 1
+    assert ptp.coalesced_writes == 2
+
+
+async def test_later_value_of_a_datapoint_wins(ptp, stub_server, entities):
+    entity = entities[0]
+
+    results = await asyncio.gather(
+        ptp.async_device_control(entity, SERVICE_SET_TEMPERATURE, 21.5),
+        ptp.async_device_control(entity, SERVICE_SET_TEMPERATURE, 23),
+    )
+
+    assert results == [True, True]
+    assert stub_server.commands == [(entity.device_id, [{"index": 7, "value": 230}])]
+    assert stub_server.devices[entity.device_id].state["7"] == 230
+
+
+async def test_devices_are_written_separately(ptp, stub_server, entities):
+    results = await asyncio.gather(
+        *(
+            ptp.async_device_control(entity, SERVICE_SET_HUMIDITY, 60)
+            for entity in entities
+        )
+    )
+
+    assert results == [True] * len(entities)
+    assert sorted(device_id for device_id, _ in stub_server.commands) == sorted(
+        entity.device_id for entity in entities
+    )
+    assert ptp.coalesced_writes == 0
+
+
+async def test_failed_write_fails_every_caller(ptp, stub_server, entities):
+    entity = entities[0]
+    stub_server.faults.server_error_rate = 1.0
+
+    results = await asyncio.gather(
+        ptp.async_device_control(entity, SERVICE_SET_TEMPERATURE, 21.5),
+        ptp.async_device_control(entity, SERVICE_SET_HUMIDITY, 55),
+    )
+
+    assert results == [False, False]
+    assert stub_server.request_count(f"/device/set/{entity.device_id}") == 1
+
+
+async def test_command_after_the_window_is_a_new_write(ptp, stub_server, entities):
+    entity = entities[0]
+
+    first = asyncio.ensure_future(
+        ptp.async_device_control(entity, SERVICE_SET_TEMPERATURE, 21.5)
+    )
+    await asyncio.sleep(ptp.write_coalesce_window * 2)
+    second = await ptp.async_device_control(entity, SERVICE_SET_HUMIDITY, 55)
+
+    assert await first and second
+    assert stub_server.commands == [
+        (entity.device_id, [{"index": 7, "value": 215.0}]),
+        (entity.device_id, [{"index": 8, "value": 55}]),
+    ]
+
+
+async def test_large_fleet_poll_is_not_throttled(socket_enabled):
+    server = XlinkStubServer(build_fleet(st2000=300, st830=300))
+    await server.async_start()
+    ptp = PTP()
+    ptp.api.base_url = server.url
+    # 60 chunks, the default v_devices bucket alone would spread them over 10s
+    ptp.batch_query_size = 10
+    try:
+        await ptp.async_user_auth(USERNAME, PASSWORD)
+        started = time.monotonic()
+        states, failed = await ptp.async_batch_device_state(_by_product(server))
+        elapsed = time.monotonic() - started
+    finally:
+        await ptp.async_close()
+        await server.async_stop()
+
+    assert not failed
+    assert len(states) == len(server.devices)
+    assert server.request_count("/v_devices") == 60
+    assert elapsed < 3
+
+
+async def test_unchanged_states_are_skipped(ptp, stub_server):
+    pid_to_devices = _by_product(stub_server)
+    first, _ = await ptp.async_batch_device_state(pid_to_devices)
+    assert set(first) == set(map(str, stub_server.devices))
+
+    second, failed = await ptp.async_batch_device_state(pid_to_devices)
+
+    assert not failed
+    assert second == {}
+    assert set(ptp._polled_states) == set(first)
+
+
+async def test_changed_state_is_decoded(ptp, stub_server):
+    pid_to_devices = _by_product(stub_server)
+    await ptp.async_batch_device_state(pid_to_devices)
+    device = next(iter(stub_server.devices.values()))
+    device.state["7"] = 235
+
+    states, _ = await ptp.async_batch_device_state(pid_to_devices)
+
+    assert list(states) == [str(device.device_id)]
+    properties = states[str(device.device_id)]["properties"]
+    assert properties[SERVICE_SET_TEMPERATURE] == 23.5
+    assert states[str(device.device_id)]["raw_data"]["7"] == 235
+
+
+async def test_forgotten_states_are_decoded_again(ptp, stub_server):
+    pid_to_devices = _by_product(stub_server)
+    await ptp.async_batch_device_state(pid_to_devices)
+    device_id = str(next(iter(stub_server.devices)))
+
+    ptp.forget_states([device_id])
+    states, _ = await ptp.async_batch_device_state(pid_to_devices)
+    assert list(states) == [device_id]
+
+    ptp.forget_states()
+    assert not ptp._polled_states
+    states, _ = await ptp.async_batch_device_state(pid_to_devices)
+    assert set(states) == set(map(str, stub_server.devices))
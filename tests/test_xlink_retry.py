@@ -0,0 +1,80 @@
+"""Circuit breaker of the Xlink transport against the stub cloud."""
+
+import asyncio
+
+import pytest
+
+from custom_components.linkedgo_bridge.xlink_api import XlinkEndpoint
+from custom_components.linkedgo_bridge.xlink_retry import (
+    CircuitBreaker,
+    CircuitState,
+    RetryPolicy,
+)
+from xlink_server import PID_ST2000
+
+pytestmark = pytest.mark.asyncio
+
+RECOVERY_TIMEOUT = 0.2
+
+
+@pytest.fixture
+def api(ptp):
+    """Logged in client whose breaker opens after two failed polls."""
+    api = ptp.api
+    api.circuit_breaker = CircuitBreaker(
+        failure_threshold=2, recovery_timeout=RECOVERY_TIMEOUT
+    )
+    # One attempt per call, every failed call is one breaker failure.
+    api.endpoint_retry_policies = {XlinkEndpoint.V_DEVICES: RetryPolicy(attempts=1)}
+    return api
+
+
+async def _async_poll(api, stub_server):
+    return await api.async_batch_query_vdevice(PID_ST2000, list(stub_server.devices))
+
+
+async def _async_open_circuit(api, stub_server):
+    stub_server.faults.server_error_rate = 1.0
+    for _ in range(2):
+        code, _ = await _async_poll(api, stub_server)
+        assert code == 503
+    assert api.circuit_breaker.state == CircuitState.OPEN
+
+
+async def test_open_circuit_fails_fast(api, stub_server):
+    await _async_open_circuit(api, stub_server)
+    sent = stub_server.request_count("/v_devices")
+
+    assert await _async_poll(api, stub_server) == (None, None)
+    assert stub_server.request_count("/v_devices") == sent
+    assert not api.online
+
+
+async def test_half_open_circuit_sends_one_probe(api, stub_server):
+    await _async_open_circuit(api, stub_server)
+    await asyncio.sleep(RECOVERY_TIMEOUT * 1.5)
+    stub_server.faults.server_error_rate = 0.0
+    # Keep the probe in flight while the second poll asks to be sent.
+    stub_server.faults.latency = 0.1
+    sent = stub_server.request_count("/v_devices")
+
+    probe, rejected = await asyncio.gather(
+        _async_poll(api, stub_server), _async_poll(api, stub_server)
+    )
+
+    assert probe[0] == 200
+    assert rejected == (None, None)
+    assert stub_server.request_count("/v_devices") == sent + 1
+    assert api.circuit_breaker.state == CircuitState.CLOSED
+    assert api.online
+
+
+async def test_failed_probe_reopens_circuit(api, stub_server):
+    await _async_open_circuit(api, stub_server)
+    await asyncio.sleep(RECOVERY_TIMEOUT * 1.5)
+
+    code, _ = await _async_poll(api, stub_server)
+
+    assert code == 503
+    assert api.circuit_breaker.state == CircuitState.OPEN
+    assert await _async_poll(api, stub_server) == (None, None)
@@ -0,0 +1,115 @@
+"""Priority ordering of the Xlink request scheduler."""
+
+import asyncio
+
+import pytest
+
+from custom_components.linkedgo_bridge.xlink_scheduler import (
+    PrioritySemaphore,
+    RequestPriority,
+    XlinkRequestScheduler,
+    prioritized,
+)
+
+pytestmark = pytest.mark.asyncio
+
+INTERACTIVE = RequestPriority.INTERACTIVE
+BACKGROUND = RequestPriority.BACKGROUND
+
+
+async def _async_queue(semaphore: PrioritySemaphore, waiters, served: list):
+    """Queue (name, priority) waiters in order, each records when served."""
+
+    async def wait(name, priority):
+        await semaphore.acquire(priority)
+        served.append(name)
+        semaphore.release()
+
+    tasks = []
+    for name, priority in waiters:
+        tasks.append(asyncio.ensure_future(wait(name, priority)))
+        # Let it reach the queue before the next one.
+        await asyncio.sleep(0)
+    return tasks
+
+
+async def test_interactive_waiter_overtakes_background():
+    semaphore = PrioritySemaphore(1)
+    await semaphore.acquire(BACKGROUND)
+    served = []
+    tasks = await _async_queue(
+        semaphore,
+        [
+            ("poll 1", BACKGROUND),
+            ("poll 2", BACKGROUND),
+            ("control 1", INTERACTIVE),
+            ("control 2", INTERACTIVE),
+        ],
+        served,
+    )
+    assert semaphore.waiting == {BACKGROUND: 2, INTERACTIVE: 2}
+
+    semaphore.release()
+    await asyncio.gather(*tasks)
+
+    assert served == ["control 1", "control 2", "poll 1", "poll 2"]
+    assert +semaphore.waiting == {}
+
+
+async def test_reserved_slot_is_left_to_interactive():
+    semaphore = PrioritySemaphore(2, reserved=1)
+    await semaphore.acquire(BACKGROUND)
+    served = []
+    (poll,) = await _async_queue(semaphore, [("poll", BACKGROUND)], served)
+    assert served == []
+
+    await asyncio.wait_for(semaphore.acquire(INTERACTIVE), 1)
+    semaphore.release()
+    await asyncio.sleep(0)
+    assert served == []
+
+    semaphore.release()
+    await poll
+    assert served == ["poll"]
+
+
+async def test_cancelled_waiter_passes_the_slot_on():
+    semaphore = PrioritySemaphore(1)
+    await semaphore.acquire(BACKGROUND)
+    served = []
+    control, poll = await _async_queue(
+        semaphore, [("control", INTERACTIVE), ("poll", BACKGROUND)], served
+    )
+
+    control.cancel()
+    semaphore.release()
+    await poll
+
+    assert served == ["poll"]
+    assert control.cancelled()
+    assert +semaphore.waiting == {}
+
+
+async def test_prioritized_requests_overtake_queued_polls():
+    scheduler = XlinkRequestScheduler(1, {})
+    served = []
+
+    async def request(name):
+        async with scheduler.async_slot():
+            served.append(name)
+
+    async def control(name):
+        with prioritized(INTERACTIVE):
+            await request(name)
+
+    async with scheduler.async_slot():
+        tasks = []
+        for coro in (request("poll 1"), request("poll 2"), control("control")):
+            tasks.append(asyncio.ensure_future(coro))
+            await asyncio.sleep(0)
+        stats = scheduler.as_dict()
+        assert stats["background"]["queued"] == 2
+        assert stats["interactive"]["queued"] == 1
+    await asyncio.gather(*tasks)
+
+    assert served == ["control", "poll 1", "poll 2"]
@@ -0,0 +1,368 @@
+"""Local stand-in for the Xlink cloud api (api2.xlink.cn).
+
+Implements the endpoints XlinkAPI talks to, serves a configurable fleet of
+ST2000 / ST830 / ST1800-HN devices and can inject latency, jitter, expired
+tokens, 5xx responses and timeouts. Point a client at it with
+``api.base_url = server.url``.
+
+Run standalone:
+
+    python tests/xlink_server.py --port 8080 --st2000 50 --st1800 20 --latency 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import hashlib
+import itertools
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+PID_ST2000 = "160898c835f003e9160898c835f0d601"
+PID_ST830 = "160042bed58403e9160042bed5842801"
+PID_ST1800_HN = "1603bec1cd5903e91603bec1cd599801"
+
+MODEL_NAMES = {
+    PID_ST2000: "ST2000",
+    PID_ST830: "ST830",
+    PID_ST1800_HN: "ST1800-HN",
+}
+
+# xlink error codes carried in 403 bodies
+CODE_ACCESS_TOKEN_EXPIRED = 4031021
+CODE_REFRESH_TOKEN_EXPIRED = 4001010
+
+
+@dataclass
+class FaultConfig:
+    """Latency and fault injection knobs, may be changed while serving."""
+
+    # base latency of every response in seconds
+    latency: float = 0.0
+    # uniform +/- jitter added to latency in seconds
+    jitter: float = 0.0
+    # probability of answering an authenticated call with an expired token 403
+    expired_token_rate: float = 0.0
+    # probability of answering with a 5xx
+    server_error_rate: float = 0.0
+    # probability of never answering within 'timeout_delay'
+    timeout_rate: float = 0.0
+    # seconds a timed out request hangs
+    timeout_delay: float = 30.0
+    # probability of answering with 429 and Retry-After
+    rate_limit_rate: float = 0.0
+    # Retry-After seconds of injected 429s
+    retry_after: float = 1.0
+    # probability that a device reading changes between two v_devices queries
+    churn: float = 0.0
+    # product ids whose v_devices queries are answered with a 5xx
+    failing_products: set[str] = field(default_factory=set)
+
+
+@dataclass
+class StubDevice:
+    """A device of the fleet and its raw datapoints, keyed by index string."""
+
+    device_id: int
+    product_id: str
+    mac: str
+    name: str
+    online: bool = True
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+def _air_state(rng: random.Random) -> dict[str, Any]:
+    """Datapoints of an ST2000/ST830 air unit."""
+    return {
+        "0": rng.choice((0, 1)),
+        "1": rng.choice((0, 1)),
+        "2": rng.choice((0, 1, 3, 6, 80)),
+        "3": rng.choice((0, 3, 7)),
+        "4": rng.choice((0, 1)),
+        "6": rng.randint(0, 3),
+        "7": rng.randrange(160, 300, 5),
+        "8": rng.randrange(40, 75),
+        "116": rng.randrange(150, 320),
+        "117": rng.randrange(300, 800),
+        "130": rng.choice((0, 0x40, 0x80)),
+    }
+
+
+def _floor_state(rng: random.Random) -> dict[str, Any]:
+    """Datapoints of an ST1800-HN floor heating unit."""
+    return {
+        "0": rng.choice((0, 1)),
+        "1": rng.randrange(160, 300, 5),
+        "20": rng.randrange(150, 320),
+        "21": rng.randrange(300, 800),
+        "23": rng.choice((0, 0x40)),
+    }
+
+
+def build_fleet(
+    st2000: int = 0, st830: int = 0, st1800: int = 0, seed: int = 0
+) -> list[StubDevice]:
+    """Create a fleet with the given number of devices per model.
+
+    :param seed: seed of the random initial states.
+    :return: devices, ids are unique and ascending.
+    :rtype: list
+    """
+    rng = random.Random(seed)
+    ids = itertools.count(100000)
+    devices = []
+    fleet = ((PID_ST2000, st2000), (PID_ST830, st830), (PID_ST1800_HN, st1800))
+    for pid, count in fleet:
+        for _ in range(count):
+            device_id = next(ids)
+            state = _floor_state(rng) if pid == PID_ST1800_HN else _air_state(rng)
+            devices.append(
+                StubDevice(
+                    device_id=device_id,
+                    product_id=pid,
+                    mac="02:00:"
+                    + ":".join(f"{byte:02x}" for byte in device_id.to_bytes(4, "big")),
+                    name=f"{MODEL_NAMES[pid]} {device_id}",
+                    state=state,
+                )
+            )
+    return devices
+
+
+class XlinkStubServer:
+    """aiohttp application mimicking the Xlink endpoints used by XlinkAPI."""
+
+    def __init__(
+        self,
+        devices: list[StubDevice] | None = None,
+        faults: FaultConfig | None = None,
+        token_ttl: int = 7200,
+        home_id: int = 1,
+        home_name: str = "Stub home",
+        seed: int = 0,
+    ) -> None:
+        """Initiate XlinkStubServer class."""
+        self.devices = {device.device_id: device for device in devices or []}
+        self.faults = faults or FaultConfig()
+        self.token_ttl = token_ttl
+        self.home_id = home_id
+        self.home_name = home_name
+        self.user_id = 4242
+        self.access_token = None
+        self.refresh_token = None
+        self.requests: list[tuple[str, str]] = []
+        self.commands: list[tuple[int, list]] = []
+        self._rng = random.Random(seed)
+        self._tokens = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self.url = None
+
+        self.app = web.Application(middlewares=[self._fault_middleware])
+        self.app.router.add_post("/v2/user_auth", self._user_auth)
+        self.app.router.add_post("/v2/user/token/refresh", self._token_refresh)
+        self.app.router.add_get("/v2/homes", self._homes)
+        self.app.router.add_get("/v2/home/{home_id}/devices", self._home_devices)
+        self.app.router.add_post(
+            "/v2/product/{product_id}/v_devices", self._v_devices
+        )
+        self.app.router.add_post(
+            "/v2/diagnosis/device/set/{device_id}", self._device_set
+        )
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving, returns the base url."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def async_stop(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def request_count(self, suffix: str) -> int:
+        """Requests received on paths ending with 'suffix'."""
+        return sum(1 for _, path in self.requests if path.endswith(suffix))
+
+    def expire_tokens(self):
+        """Invalidate the issued access token, the next call gets a 403."""
+        self.access_token = None
+
+    @staticmethod
+    def _error(status: int, code: int, msg: str) -> web.Response:
+        return web.json_response({"error": {"code": code, "msg": msg}}, status=status)
+
+    def _issue_tokens(self) -> dict[str, Any]:
+        serial = next(self._tokens)
+        self.access_token = f"access-{serial}"
+        self.refresh_token = f"refresh-{serial}"
+        return {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "expire_in": self.token_ttl,
+        }
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        self.requests.append((request.method, request.path))
+        faults = self.faults
+        rng = self._rng
+        delay = faults.latency
+        if faults.jitter:
+            delay += rng.uniform(-faults.jitter, faults.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if faults.timeout_rate and rng.random() < faults.timeout_rate:
+            await asyncio.sleep(faults.timeout_delay)
+        if faults.server_error_rate and rng.random() < faults.server_error_rate:
+            return self._error(503, 5031001, "service unavailable")
+        if faults.rate_limit_rate and rng.random() < faults.rate_limit_rate:
+            return web.json_response(
+                {"error": {"code": 4291001, "msg": "too many requests"}},
+                status=429,
+                headers={"Retry-After": str(faults.retry_after)},
+            )
+        if request.path not in ("/v2/user_auth", "/v2/user/token/refresh"):
+            token = request.headers.get("Access-Token")
+            if not token or token != self.access_token:
+                return self._error(403, CODE_ACCESS_TOKEN_EXPIRED, "token expired")
+            if faults.expired_token_rate and rng.random() < faults.expired_token_rate:
+                self.expire_tokens()
+                return self._error(403, CODE_ACCESS_TOKEN_EXPIRED, "token expired")
+        return await handler(request)
+
+    async def _user_auth(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("phone") or not body.get("password"):
+            return self._error(403, 4001007, "invalid credentials")
+        rsp = self._issue_tokens()
+        rsp["user_id"] = self.user_id
+        rsp["authorize"] = f"authorize-{self.user_id}"
+        return web.json_response(rsp)
+
+    async def _token_refresh(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not self.refresh_token or body.get("refresh_token") != self.refresh_token:
+            return self._error(
+                403, CODE_REFRESH_TOKEN_EXPIRED, "refresh token expired"
+            )
+        return web.json_response(self._issue_tokens())
+
+    @staticmethod
+    def _conditional(request: web.Request, body: dict) -> web.Response:
+        """Metadata response with an ETag, 304 when the client has it."""
+        etag = '"%s"' % hashlib.sha1(
+            json.dumps(body, sort_keys=True).encode()
+        ).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(body, headers={"ETag": etag})
+
+    async def _homes(self, request: web.Request) -> web.Response:
+        return self._conditional(
+            request,
+            {"count": 1, "list": [{"id": self.home_id, "name": self.home_name}]},
+        )
+
+    async def _home_devices(self, request: web.Request) -> web.Response:
+        if request.match_info["home_id"] != str(self.home_id):
+            return self._error(404, 4041001, "home not found")
+        return self._conditional(
+            request,
+            {
+                "count": len(self.devices),
+                "list": [
+                    {
+                        "id": device.device_id,
+                        "product_id": device.product_id,
+                        "mac": device.mac,
+                        "name": device.name,
+                        "mcu_version": 3,
+                        "is_online": device.online,
+                    }
+                    for device in self.devices.values()
+                ],
+            },
+        )
+
+    def _churn(self, device: StubDevice):
+        index = "20" if device.product_id == PID_ST1800_HN else "116"
+        device.state[index] += self._rng.choice((-1, 1))
+
+    async def _v_devices(self, request: web.Request) -> web.Response:
+        product_id = request.match_info["product_id"]
+        if product_id in self.faults.failing_products:
+            return self._error(503, 5031001, "service unavailable")
+        device_ids = await request.json()
+        states = []
+        for device_id in device_ids:
+            device = self.devices.get(int(device_id))
+            if device is None or device.product_id != product_id:
+                continue
+            if self.faults.churn and self._rng.random() < self.faults.churn:
+                self._churn(device)
+            states.append({"device_id": device.device_id, **device.state})
+        return web.json_response({"count": len(states), "list": states})
+
+    async def _device_set(self, request: web.Request) -> web.Response:
+        device = self.devices.get(int(request.match_info["device_id"]))
+        if device is None:
+            return self._error(404, 4041002, "device not found")
+        datapoints = (await request.json()).get("datapoint", [])
+        self.commands.append((device.device_id, datapoints))
+        for datapoint in datapoints:
+            device.state[str(datapoint["index"])] = datapoint["value"]
+        return web.json_response({})
+
+
+async def _async_main(args: argparse.Namespace):
+    server = XlinkStubServer(
+        build_fleet(args.st2000, args.st830, args.st1800, seed=args.seed),
+        FaultConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            expired_token_rate=args.expired_token_rate,
+            server_error_rate=args.server_error_rate,
+            timeout_rate=args.timeout_rate,
+            churn=args.churn,
+        ),
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+    )
+    url = await server.async_start(args.host, args.port)
+    print(json.dumps({"url": url, "devices": len(server.devices)}))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--st2000", type=int, default=10)
+    parser.add_argument("--st830", type=int, default=10)
+    parser.add_argument("--st1800", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--expired-token-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--churn", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=int, default=7200)
+    parser.add_argument("--seed", type=int, default=0)
+    try:
+        asyncio.run(_async_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass